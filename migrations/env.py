@@ -8,10 +8,10 @@ from sqlalchemy.ext.asyncio import async_engine_from_config
 from alembic import context
 from src.core.database_setup import Base
 from src.db.models.log_models import LogEntry
-from src.db.models.openai_models import User, Thread
+from src.db.models.openai_models import User, Thread, Bot, ConversationMessage
 from src.db.models.instagram_models import InstagramUser, InstagramApp
 from src.db.models.telegram_models import TelegramApp, TelegramUser
-from src.db.models.whatsapp_models import WhatsAppUser
+from src.db.models.whatsapp_models import WhatsAppUser, WhatsAppDeadLetter
 from src.core.config import ASYNC_DATABASE_URL
 
 
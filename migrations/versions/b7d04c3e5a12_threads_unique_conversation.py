@@ -0,0 +1,37 @@
+"""threads unique conversation
+
+Revision ID: b7d04c3e5a12
+Revises: 6c1f2e9a7b30
+Create Date: 2026-10-18 11:03:54.772310
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7d04c3e5a12'
+down_revision: Union[str, None] = '6c1f2e9a7b30'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Concurrent first messages may already have produced duplicate rows, keep one per conversation
+    op.execute(
+        """
+        DELETE FROM threads a
+        USING threads b
+        WHERE a.sender_id = b.sender_id
+          AND a.owner_id = b.owner_id
+          AND a.platform = b.platform
+          AND a.thread_id > b.thread_id
+        """
+    )
+    op.create_index('ux_threads_sender_owner_platform', 'threads', ['sender_id', 'owner_id', 'platform'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index('ux_threads_sender_owner_platform', table_name='threads')
@@ -0,0 +1,28 @@
+"""index account user ids
+
+Revision ID: e4a9c2d17f85
+Revises: b7d04c3e5a12
+Create Date: 2026-10-18 14:21:07.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4a9c2d17f85'
+down_revision: Union[str, None] = 'b7d04c3e5a12'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(op.f('ix_instagram_users_user_id'), 'instagram_users', ['user_id'], unique=False)
+    op.create_index(op.f('ix_telegram_users_user_id'), 'telegram_users', ['user_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_telegram_users_user_id'), table_name='telegram_users')
+    op.drop_index(op.f('ix_instagram_users_user_id'), table_name='instagram_users')
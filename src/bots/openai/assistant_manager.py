@@ -1,5 +1,20 @@
+import asyncio
+import random
+import httpx
 import openai
-from src.core.config import OPENAI_API_KEY
+from openai import AsyncStream, NOT_GIVEN
+from src.core.config import (
+    OPENAI_API_KEY,
+    OPENAI_RUN_COMPLETION_MODE,
+    OPENAI_POLL_INITIAL_INTERVAL,
+    OPENAI_POLL_MAX_INTERVAL,
+    OPENAI_POLL_BACKOFF_FACTOR,
+    ASSISTANT_CACHE_SIZE,
+    ASSISTANT_CACHE_TTL,
+)
+from src.utils.cache import TTLCache
+from src.utils.metrics import register_metrics
+from src.utils.errors_handler import AssistantRunError
 import logging
 
 
@@ -7,86 +22,175 @@ logger = logging.getLogger(__name__)
 
 openai.api_key = OPENAI_API_KEY
 
+_client = None
+
+RUN_PENDING_STATUSES = {"queued", "in_progress", "cancelling"}
+
+run_stats = {
+    "runs": 0,
+    "streamed_runs": 0,
+    "stream_fallbacks": 0,
+    "poll_calls": 0,
+}
+
+# Assistant definitions rarely change, so set_assistant does not need a retrieve per message
+assistant_cache = TTLCache(maxsize=ASSISTANT_CACHE_SIZE, ttl=ASSISTANT_CACHE_TTL)
+
+register_metrics("assistant_runs", lambda: dict(run_stats))
+register_metrics("assistant_cache", assistant_cache.stats)
+
+
+def get_openai_client() -> openai.AsyncOpenAI:
+    """
+    Return the process-wide AsyncOpenAI client, so all managers share one connection pool.
+    """
+    global _client
+    if _client is None:
+        _client = openai.AsyncOpenAI(api_key=OPENAI_API_KEY)
+    return _client
+
+
+def invalidate_assistant_cache(*assistant_ids: str):
+    """
+    Drop cached assistant objects, e.g. after a bot has been rebound.
+    """
+    for assistant_id in assistant_ids:
+        if assistant_id:
+            assistant_cache.invalidate(assistant_id)
+
+
+class ThreadHandle:
+    """
+    Reference to an existing thread by its ID; the thread object is only fetched when its metadata is needed.
+    """
+
+    def __init__(self, client: openai.AsyncOpenAI, thread_id: str) -> None:
+        self.client = client
+        self.id = thread_id
+        self._thread = None
+
+    @property
+    def fetched(self) -> bool:
+        return self._thread is not None
+
+    async def fetch(self):
+        if self._thread is None:
+            self._thread = await self.client.beta.threads.retrieve(thread_id=self.id)
+        return self._thread
+
+
 class AssistantManager:
-    def __init__(self, model: str = "gpt-3.5-turbo", assistant_id: str = None, thread_id: str = None) -> None:
-        self.client = openai.OpenAI()
+    def __init__(
+        self,
+        model: str = "gpt-3.5-turbo",
+        assistant_id: str = None,
+        thread_id: str = None,
+        completion_mode: str = OPENAI_RUN_COMPLETION_MODE,
+    ) -> None:
+        self.client = get_openai_client()
         self.model = model
         self.assistant_id = assistant_id
         self.thread_id = thread_id
+        self.completion_mode = completion_mode
         self.assistant = None
         self.thread = None
         self.run = None
+        self.run_events = None
+        self.run_output = None
+        self.poll_calls = 0
+        self.api_calls = 0
 
-        if self.assistant_id:
-            print(f"Reusing assistant ID: {self.assistant_id}")
-            self.assistant = self.client.beta.assistants.retrieve(
-                assistant_id=self.assistant_id
-            )
-
-        if self.thread_id:
-            print(f"Reusing thread ID: {self.thread_id}")
-            self.thread = self.client.beta.threads.retrieve(
-                thread_id=self.thread_id
-            )
-
-    def create_assistant(self, name, instructions, tools):
+    @classmethod
+    async def create(cls, model: str = "gpt-3.5-turbo", assistant_id: str = None, thread_id: str = None):
+        """
+        Build a manager and load the given assistant and thread, if any.
+        """
+        manager = cls(model=model)
+        if assistant_id:
+            logger.debug(f"Reusing assistant ID: {assistant_id}")
+            await manager.set_assistant(assistant_id)
+        if thread_id:
+            logger.debug(f"Reusing thread ID: {thread_id}")
+            manager.set_thread(thread_id)
+        return manager
+
+    async def create_assistant(self, name, instructions, tools):
         """
         Create an assistant if one does not already exist.
         """
         if not self.assistant_id:
-            assistant_obj = self.client.beta.assistants.create(
+            assistant_obj = await self.client.beta.assistants.create(
                 name=name,
                 instructions=instructions,
                 tools=tools,
                 model=self.model,
             )
+            self.api_calls += 1
             self.assistant_id = assistant_obj.id
             self.assistant = assistant_obj
-            print(f"Assistant created with ID: {self.assistant.id}")
+            logger.debug(f"Assistant created with ID: {self.assistant.id}")
         else:
-            print(f"Using existing assistant ID: {self.assistant_id}")
+            logger.debug(f"Using existing assistant ID: {self.assistant_id}")
 
         return self.assistant_id
 
-    def set_assistant(self, assistant_id: str):
+    async def set_assistant(self, assistant_id: str):
         """
         Set the assistant in AssistantManager using the provided assistant_id.
         """
         if not assistant_id:
             raise ValueError("Assistant ID is required to set the assistant.")
 
-        self.assistant = self.client.beta.assistants.retrieve(assistant_id=assistant_id)
-        self.assistant_id = assistant_id
-        print(f"Assistant retrieved with ID: {self.assistant.id}")
-
+        assistant = assistant_cache.get(assistant_id)
+        if assistant is None:
+            assistant = await self.client.beta.assistants.retrieve(assistant_id=assistant_id)
+            self.api_calls += 1
+            assistant_cache.set(assistant_id, assistant)
+            logger.debug(f"Assistant retrieved with ID: {assistant.id}")
 
+        self.assistant = assistant
+        self.assistant_id = assistant_id
 
-    def create_thread(self):
+    async def create_thread(self):
         """
         Create a new thread if one does not already exist.
         """
         if not self.thread_id:
-            thread_obj = self.client.beta.threads.create()
+            thread_obj = await self.client.beta.threads.create()
+            self.api_calls += 1
             self.thread_id = thread_obj.id
             self.thread = thread_obj
-            print(f"Thread created with ID: {self.thread.id}")
+            logger.debug(f"Thread created with ID: {self.thread.id}")
         else:
-            print(f"Using existing thread ID: {self.thread_id}")
+            logger.debug(f"Using existing thread ID: {self.thread_id}")
 
         return self.thread_id
 
     def set_thread(self, thread_id: str):
         """
         Set the thread in AssistantManager using the provided thread_id.
+        No request is made; use get_thread_details when the thread metadata is needed.
         """
         if not thread_id:
             raise ValueError("Thread ID is required to set the thread.")
 
-        self.thread = self.client.beta.threads.retrieve(thread_id=thread_id)
+        self.thread = ThreadHandle(self.client, thread_id)
         self.thread_id = thread_id
-        print(f"Thread retrieved with ID: {self.thread.id}")
 
-    def add_message_to_thread(self, role, content):
+    async def get_thread_details(self):
+        """
+        Return the full thread object, fetching it if only its ID is known.
+        """
+        if not self.thread:
+            raise ValueError("Thread is not initialized. Please create or retrieve a thread first.")
+
+        if isinstance(self.thread, ThreadHandle):
+            if not self.thread.fetched:
+                self.api_calls += 1
+            return await self.thread.fetch()
+        return self.thread
+
+    async def add_message_to_thread(self, role, content):
         """
         Add a message to the thread.
         """
@@ -94,24 +198,26 @@ class AssistantManager:
             raise ValueError("Thread is not initialized. Please create or retrieve a thread before adding a message.")
 
         try:
-            print(f"Adding message to thread: {content}")
-            message = self.client.beta.threads.messages.create(
+            logger.debug(f"Adding message to thread: {content}")
+            message = await self.client.beta.threads.messages.create(
                 thread_id=self.thread.id,
                 role=role,
                 content=content,
             )
+            self.api_calls += 1
             if not message or not hasattr(message, "content"):
                 raise ValueError(f"Unexpected response from OpenAI: {message}")
-            print(f"Message stored in thread: {message.content}")
+            logger.debug(f"Message stored in thread: {message.content}")
             return message
         except Exception as e:
             logger.error(f"Error adding message to thread: {e}")
             raise
 
-
-    def run_assistant(self, instructions: str) -> dict:
+    async def run_assistant(self, instructions: str, additional_messages: list = None) -> dict:
         """
         Run the assistant using the provided instructions on the current thread.
+        Messages passed in additional_messages are added to the thread by the same request.
+        In "stream" mode the run event stream is opened and kept for wait_for_completion.
         """
         if not self.thread:
             raise ValueError("Thread is not initialized. Please create or retrieve a thread before running the assistant.")
@@ -120,18 +226,132 @@ class AssistantManager:
             raise ValueError("Assistant is not initialized. Please create or retrieve an assistant before running.")
 
         try:
-            print(f"Running assistant with instructions: {instructions}")
-            self.run = self.client.beta.threads.runs.create(
+            logger.debug(f"Running assistant with instructions: {instructions}")
+            self._reset_run()
+            run = await self.client.beta.threads.runs.create(
                 thread_id=self.thread.id,
                 assistant_id=self.assistant.id,
                 instructions=instructions,
+                additional_messages=additional_messages or NOT_GIVEN,
+                stream=self.completion_mode == "stream",
             )
+            self.api_calls += 1
+            await self._set_run(run)
             return {"status": "started", "run_id": self.run.id}
         except Exception as e:
             logger.error(f"Error running assistant: {e}")
             raise
 
-    def wait_for_completion(self):
+    async def create_thread_and_run(self, content: str, instructions: str) -> dict:
+        """
+        Create a thread holding the user message and start a run on it with a single request.
+        """
+        if not self.assistant:
+            raise ValueError("Assistant is not initialized. Please create or retrieve an assistant before running.")
+
+        try:
+            logger.debug(f"Creating thread and running assistant with instructions: {instructions}")
+            self._reset_run()
+            run = await self.client.beta.threads.create_and_run(
+                assistant_id=self.assistant.id,
+                thread={"messages": [{"role": "user", "content": content}]},
+                instructions=instructions,
+                stream=self.completion_mode == "stream",
+            )
+            self.api_calls += 1
+            await self._set_run(run)
+            self.thread = ThreadHandle(self.client, self.run.thread_id)
+            self.thread_id = self.run.thread_id
+            logger.debug(f"Thread created with ID: {self.thread_id}")
+            return {"status": "started", "run_id": self.run.id}
+        except Exception as e:
+            logger.error(f"Error creating thread and running assistant: {e}")
+            raise
+
+    async def run_with_message(self, content: str, instructions: str) -> dict:
+        """
+        Add a user message and start a run in one request: create_and_run when there is no thread yet,
+        runs.create with additional_messages on an existing thread.
+        """
+        if not self.thread:
+            return await self.create_thread_and_run(content, instructions)
+        return await self.run_assistant(
+            instructions,
+            additional_messages=[{"role": "user", "content": content}],
+        )
+
+    def _reset_run(self):
+        self.poll_calls = 0
+        self.run_output = None
+        run_stats["runs"] += 1
+
+    async def _set_run(self, run):
+        if isinstance(run, AsyncStream):
+            await self._start_run_stream(run)
+        else:
+            self.run = run
+
+    async def _start_run_stream(self, stream):
+        """
+        Read the run event stream until the run object is known.
+        """
+        run_stats["streamed_runs"] += 1
+        self.run_events = stream
+        self.run = None
+        while self.run is None:
+            try:
+                event = await stream.__anext__()
+            except StopAsyncIteration:
+                raise ValueError("Run event stream ended before the run was created.")
+            if getattr(event.data, "object", None) == "thread.run":
+                self.run = event.data
+
+    async def _consume_run_stream(self):
+        """
+        Consume the rest of the run event stream, keeping self.run up to date.
+        Returns True if the stream delivered a final run status.
+        """
+        try:
+            # Iterate with __anext__ so the events already read by _start_run_stream are not replayed
+            while True:
+                try:
+                    event = await self.run_events.__anext__()
+                except StopAsyncIteration:
+                    break
+                if getattr(event.data, "object", None) == "thread.run":
+                    self.run = event.data
+                    if self.run.status not in RUN_PENDING_STATUSES:
+                        return True
+                elif event.event == "thread.message.completed" and event.data.role == "assistant":
+                    # Keep the run's reply, so process_message does not have to list the thread
+                    self.run_output = event.data
+            return self.run.status not in RUN_PENDING_STATUSES
+        except (openai.APIError, httpx.HTTPError) as e:
+            logger.warning(f"Run event stream for run {self.run.id} broke, falling back to polling: {e}")
+            return False
+        finally:
+            await self.run_events.close()
+            self.run_events = None
+
+    async def _poll_run(self):
+        """
+        Poll the run with exponential backoff and jitter until it leaves the pending statuses.
+        """
+        delay = OPENAI_POLL_INITIAL_INTERVAL
+        while self.run.status in RUN_PENDING_STATUSES:
+            await asyncio.sleep(random.uniform(delay / 2, delay))
+            delay = min(delay * OPENAI_POLL_BACKOFF_FACTOR, OPENAI_POLL_MAX_INTERVAL)
+
+            logger.debug("Checking run status...")
+            self.run = await self.client.beta.threads.runs.retrieve(
+                thread_id=self.thread.id, run_id=self.run.id
+            )
+            self.poll_calls += 1
+            self.api_calls += 1
+            run_stats["poll_calls"] += 1
+            logger.debug(f"Run status: {self.run.status}")
+
+    async def wait_for_completion(self):
         """
         Wait until the assistant's run is completed, then process the response.
         """
@@ -139,50 +359,71 @@ class AssistantManager:
             raise ValueError("Thread or run is not initialized. Please run the assistant first.")
 
         try:
-            while True:
-                print("Checking run status...")
-                run_status = self.client.beta.threads.runs.retrieve(
-                    thread_id=self.thread.id, run_id=self.run.id
-                )
-
-                print(f"Run status: {run_status.status}")
-                if run_status.status == "completed":
-                    print("Run completed. Processing message...")
-                    return self.process_message()
-                elif run_status.status == "requires_action":
-                    # Handle required actions if applicable
-                    raise NotImplementedError("Handling required actions is not yet implemented.")
+            if self.run_events is not None and not await self._consume_run_stream():
+                run_stats["stream_fallbacks"] += 1
+            await self._poll_run()
+            logger.info(f"Run {self.run.id} finished with status {self.run.status} after {self.poll_calls} status polls")
+
+            if self.run.status == "completed":
+                logger.debug("Run completed. Processing message...")
+                return await self.process_message()
+            elif self.run.status == "incomplete":
+                logger.warning(f"Run {self.run.id} is incomplete: {self.run.incomplete_details}")
+                return await self.process_message()
+            elif self.run.status == "requires_action":
+                # Tool calls are not supported, the supervisor cancels the run
+                raise AssistantRunError(f"Run {self.run.id} requires action, which is not supported.", status="requires_action")
+
+            last_error = self.run.last_error.message if self.run.last_error else "no error details"
+            raise AssistantRunError(f"Run {self.run.id} ended with status {self.run.status}: {last_error}", status=self.run.status)
         except Exception as e:
             logger.error(f"Error waiting for completion: {e}")
             raise
 
-    def process_message(self) -> str:
+    async def cancel_run(self):
         """
-        Process the latest response message in the thread and return it.
+        Cancel the current run, so the thread accepts new messages again.
         """
-        if not self.thread:
+        if not self.thread or not self.run:
+            raise ValueError("Thread or run is not initialized. Please run the assistant first.")
+
+        self.run = await self.client.beta.threads.runs.cancel(thread_id=self.thread.id, run_id=self.run.id)
+        self.api_calls += 1
+        logger.info(f"Run {self.run.id} cancelled, status: {self.run.status}")
+        return self.run
+
+    async def process_message(self) -> dict:
+        """
+        Return the response message produced by the current run, together with the run's token usage.
+        Only the run's own latest message is requested, so the payload does not grow with the thread.
+        """
+        if not self.thread or not self.run:
             raise ValueError(
-                "Thread is not initialized. Please create or retrieve a thread before processing messages."
+                "Thread or run is not initialized. Please run the assistant before processing messages."
             )
 
         try:
-            print("Fetching messages from thread...")
-            messages = self.client.beta.threads.messages.list(thread_id=self.thread.id)
-
-            if not messages or not hasattr(messages, "data") or not messages.data:
-                raise ValueError("No messages found in the thread.")
+            last_message = self.run_output
+            if last_message is None:
+                logger.debug("Fetching run output from thread...")
+                messages = await self.client.beta.threads.messages.list(
+                    thread_id=self.thread.id,
+                    run_id=self.run.id,
+                    order="desc",
+                    limit=1,
+                )
+                self.api_calls += 1
+                if not messages or not hasattr(messages, "data") or not messages.data:
+                    raise ValueError(f"No messages found for run {self.run.id}.")
+                last_message = messages.data[0]
 
-            # Get the most recent message
-            last_message = messages.data[0]
             response_content = (
                 last_message.content[0].text.value if last_message.content else "No response content."
             )
+            usage = self.run.usage.model_dump() if self.run.usage else None
 
-            print(f"Assistant response: {response_content}")
-            return response_content
+            logger.debug(f"Assistant response: {response_content}, usage: {usage}")
+            return {"response": response_content, "usage": usage}
         except Exception as e:
             logger.error(f"Error processing messages: {e}")
             raise
-
-
-
@@ -0,0 +1,95 @@
+import logging
+from openai import NOT_GIVEN
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.bots.openai.assistant_manager import get_openai_client
+from src.core.config import (
+    CHAT_COMPLETIONS_MODEL,
+    CHAT_HISTORY_TOKEN_BUDGET,
+    CHAT_HISTORY_MAX_MESSAGES,
+)
+from src.db.repositories.conversation_repositories import get_recent_messages, add_messages
+
+
+logger = logging.getLogger(__name__)
+
+# Rough per-message overhead of the chat format, in tokens
+MESSAGE_TOKEN_OVERHEAD = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Cheap token estimate (~4 characters per token), good enough for budgeting history.
+    """
+    return len(text) // 4 + MESSAGE_TOKEN_OVERHEAD
+
+
+def truncate_history(history: list, budget: int) -> list:
+    """
+    Keep the newest messages of history (oldest first) whose estimated size fits into budget.
+    """
+    kept = []
+    for role, content in reversed(history):
+        cost = estimate_tokens(content)
+        if cost > budget:
+            break
+        budget -= cost
+        kept.append({"role": role, "content": content})
+    kept.reverse()
+    return kept
+
+
+class ChatCompletionEngine:
+    """
+    Reply engine that keeps the conversation history in our database and makes
+    a single streamed Chat Completions request per reply.
+    """
+
+    def __init__(
+        self,
+        model: str = CHAT_COMPLETIONS_MODEL,
+        instructions: str = None,
+        temperature: float = None,
+        history_token_budget: int = CHAT_HISTORY_TOKEN_BUDGET,
+    ) -> None:
+        self.client = get_openai_client()
+        self.model = model
+        self.instructions = instructions
+        self.temperature = temperature
+        self.history_token_budget = history_token_budget
+
+    def build_messages(self, history: list, message: str) -> list:
+        budget = self.history_token_budget - estimate_tokens(message)
+        messages = []
+        if self.instructions:
+            messages.append({"role": "system", "content": self.instructions})
+            budget -= estimate_tokens(self.instructions)
+        messages.extend(truncate_history(history, max(budget, 0)))
+        messages.append({"role": "user", "content": message})
+        return messages
+
+    async def reply(self, db: AsyncSession, sender_id: str, owner_id: str, platform: str, bot_id: str, message: str) -> dict:
+        # History is per bot, a conversation starts over when the account's bot is reassigned
+        history = await get_recent_messages(db, sender_id, owner_id, platform, bot_id, CHAT_HISTORY_MAX_MESSAGES)
+        messages = self.build_messages(history, message)
+
+        stream = await self.client.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            temperature=NOT_GIVEN if self.temperature is None else self.temperature,
+            stream=True,
+            stream_options={"include_usage": True},
+        )
+        parts = []
+        usage = None
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                parts.append(chunk.choices[0].delta.content)
+            if chunk.usage:
+                usage = chunk.usage.model_dump()
+        response = "".join(parts)
+
+        await add_messages(db, sender_id, owner_id, platform, bot_id, [("user", message), ("assistant", response)])
+        logger.debug(f"Chat completion for sender_id={sender_id} used {len(messages)} messages, usage: {usage}")
+
+        return {"response": response, "usage": usage}
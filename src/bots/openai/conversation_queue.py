@@ -0,0 +1,120 @@
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Hashable
+
+from src.core.config import CONVERSATION_MAX_CONCURRENCY, CONVERSATION_IDLE_TIMEOUT
+from src.utils.metrics import register_metrics
+
+
+logger = logging.getLogger(__name__)
+
+
+class ConversationQueue:
+    """
+    Processes jobs of one conversation strictly in order (OpenAI rejects new messages while
+    a run is active on the thread), while different conversations run in parallel up to
+    max_concurrency. A conversation's worker exits after idle_timeout seconds without jobs.
+    """
+
+    def __init__(self, max_concurrency: int = CONVERSATION_MAX_CONCURRENCY, idle_timeout: float = CONVERSATION_IDLE_TIMEOUT) -> None:
+        self.max_concurrency = max_concurrency
+        self.idle_timeout = idle_timeout
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._queues: dict[Hashable, asyncio.Queue] = {}
+        self._workers: dict[Hashable, asyncio.Task] = {}
+        self.running = 0
+        self.stats = {
+            "submitted": 0,
+            "processed": 0,
+            "failed": 0,
+            "skipped": 0,
+            "workers_started": 0,
+            "workers_reaped": 0,
+            "wait_time_total": 0.0,
+            "wait_time_max": 0.0,
+        }
+
+    def snapshot(self) -> dict:
+        depths = [queue.qsize() for queue in self._queues.values()]
+        started = self.stats["processed"] + self.stats["failed"]
+        return {
+            **self.stats,
+            "wait_time_avg": round(self.stats["wait_time_total"] / started, 4) if started else None,
+            "conversations": len(self._queues),
+            "queued": sum(depths),
+            "max_depth": max(depths, default=0),
+            "running": self.running,
+            "max_concurrency": self.max_concurrency,
+        }
+
+    async def submit(self, key: Hashable, job: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Queue job behind the earlier jobs of the same conversation and wait for its result.
+        """
+        future = asyncio.get_running_loop().create_future()
+        queue = self._queues.get(key)
+        if queue is None:
+            queue = self._queues[key] = asyncio.Queue()
+        queue.put_nowait((job, future, time.monotonic()))
+        self.stats["submitted"] += 1
+
+        if key not in self._workers:
+            self._workers[key] = asyncio.create_task(self._work(key, queue), name=f"conversation-{key}")
+            self.stats["workers_started"] += 1
+
+        return await future
+
+    async def _work(self, key: Hashable, queue: asyncio.Queue):
+        future = None
+        try:
+            while True:
+                try:
+                    # Not wait_for, which can lose an item dequeued just as the timeout fires
+                    async with asyncio.timeout(self.idle_timeout):
+                        job, future, enqueued_at = await queue.get()
+                except TimeoutError:
+                    if queue.empty():
+                        self.stats["workers_reaped"] += 1
+                        return
+                    continue
+
+                if future.done():
+                    # The caller has gone away
+                    self.stats["skipped"] += 1
+                    continue
+
+                async with self._semaphore:
+                    waited = time.monotonic() - enqueued_at
+                    self.stats["wait_time_total"] += waited
+                    self.stats["wait_time_max"] = max(self.stats["wait_time_max"], waited)
+                    self.running += 1
+                    try:
+                        result = await job()
+                    except Exception as e:
+                        self.stats["failed"] += 1
+                        if not future.done():
+                            future.set_exception(e)
+                    else:
+                        self.stats["processed"] += 1
+                        if not future.done():
+                            future.set_result(result)
+                    finally:
+                        self.running -= 1
+        finally:
+            del self._workers[key]
+            del self._queues[key]
+            # Cancelled while running a job: its caller must not wait forever either
+            waiting = [future] if future is not None else []
+            if not queue.empty():
+                logger.error(f"Conversation worker {key} exited with {queue.qsize()} queued jobs")
+                while not queue.empty():
+                    waiting.append(queue.get_nowait()[1])
+            for pending in waiting:
+                if not pending.done():
+                    pending.set_exception(RuntimeError(f"Conversation worker {key} stopped"))
+
+
+conversation_queue = ConversationQueue()
+
+register_metrics("conversation_queue", conversation_queue.snapshot)
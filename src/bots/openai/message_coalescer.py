@@ -0,0 +1,127 @@
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Hashable
+
+from src.core.config import MESSAGE_COALESCE_WINDOW_MS, MESSAGE_COALESCE_MAX_WAIT_MS
+from src.utils.metrics import register_metrics
+
+
+logger = logging.getLogger(__name__)
+
+
+class _PendingBatch:
+    def __init__(self, deadline: float, max_deadline: float) -> None:
+        self.messages: list[str] = []
+        self.futures: list[asyncio.Future] = []
+        self.flush = None
+        self.deadline = deadline
+        self.max_deadline = max_deadline
+
+
+class MessageCoalescer:
+    """
+    Debounces the messages of a conversation: messages arriving within window_ms of each other
+    are merged into one message and answered by a single flush. A batch is never held
+    longer than max_wait_ms after its first message.
+
+    Only messages submitted concurrently can be merged, as on the in-process reply worker
+    path. The inbound stream consumer handles a conversation's entries one after another,
+    so it merges its queued entries itself and bypasses this (coalesce=False).
+    """
+
+    def __init__(self, window_ms: int = MESSAGE_COALESCE_WINDOW_MS, max_wait_ms: int = MESSAGE_COALESCE_MAX_WAIT_MS) -> None:
+        self.window = window_ms / 1000
+        self.max_wait = max(max_wait_ms, window_ms) / 1000
+        self._pending: dict[Hashable, _PendingBatch] = {}
+        self._flushes: set[asyncio.Task] = set()
+        self.stats = {"messages": 0, "batches": 0, "runs_saved": 0}
+
+    def snapshot(self) -> dict:
+        return {
+            **self.stats,
+            "pending": len(self._pending),
+            "flushing": len(self._flushes),
+            "window_ms": int(self.window * 1000),
+        }
+
+    async def submit(self, key: Hashable, message: str, flush: Callable[[str], Awaitable[dict]]) -> dict:
+        """
+        Add message to the conversation's batch. The caller whose message closes the batch
+        gets the reply; the others get the same result with response=None and coalesced=True.
+        """
+        self.stats["messages"] += 1
+        if self.window <= 0:
+            self.stats["batches"] += 1
+            return await flush(message)
+
+        now = time.monotonic()
+        batch = self._pending.get(key)
+        if batch is None:
+            batch = self._pending[key] = _PendingBatch(now + self.window, now + self.max_wait)
+            task = asyncio.create_task(self._flush_when_quiet(key, batch))
+            self._flushes.add(task)
+            task.add_done_callback(self._flushes.discard)
+        else:
+            batch.deadline = min(now + self.window, batch.max_deadline)
+
+        future = asyncio.get_running_loop().create_future()
+        batch.messages.append(message)
+        batch.futures.append(future)
+        # The latest caller's flush is used, its request is the one still waiting the longest
+        batch.flush = flush
+        return await future
+
+    async def stop(self, timeout: float = 10):
+        """
+        Flush the pending batches without waiting for more messages, and cancel the flushes
+        still running after timeout seconds.
+        """
+        for batch in self._pending.values():
+            batch.deadline = time.monotonic()
+        if not self._flushes:
+            return
+        _, pending = await asyncio.wait(set(self._flushes), timeout=timeout)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+    async def _flush_when_quiet(self, key: Hashable, batch: _PendingBatch):
+        try:
+            await self._flush(key, batch)
+        except asyncio.CancelledError:
+            if self._pending.get(key) is batch:
+                del self._pending[key]
+            for future in batch.futures:
+                future.cancel()
+            raise
+
+    async def _flush(self, key: Hashable, batch: _PendingBatch):
+        while (delay := batch.deadline - time.monotonic()) > 0:
+            await asyncio.sleep(min(delay, self.window))
+        del self._pending[key]
+
+        self.stats["batches"] += 1
+        self.stats["runs_saved"] += len(batch.messages) - 1
+        if len(batch.messages) > 1:
+            logger.info(f"Coalesced {len(batch.messages)} messages of {key} into one run")
+
+        try:
+            result = await batch.flush("\n".join(batch.messages))
+        except Exception as e:
+            for future in batch.futures:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        *merged, last = batch.futures
+        for future in merged:
+            if not future.done():
+                future.set_result({**result, "response": None, "coalesced": True})
+        if not last.done():
+            last.set_result(result)
+
+
+message_coalescer = MessageCoalescer()
+
+register_metrics("message_coalescer", message_coalescer.snapshot)
@@ -2,9 +2,13 @@ from fastapi import APIRouter, Depends, HTTPException, Request
 from fastapi.responses import HTMLResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 import logging
+import uuid
 
 from src.core.database_setup import get_async_db
-from src.bots.openai.service import create_assistant_in_openai
+from src.core.config import CHAT_COMPLETIONS_MODEL
+from src.db.repositories.bot_repositories import save_bot
+from src.bots.openai.service import create_assistant_in_openai, invalidate_bot_settings_cache
+from src.bots.openai.assistant_manager import invalidate_assistant_cache
 from src.db.repositories.instagram_user_repositories import (
     get_instagram_account_user_by_id,
     update_instagram_bot_id
@@ -33,6 +37,12 @@ async def show_bot_creation_form(platform: str, user_id: str):
             <form action="/v1/bot/bot_creation/{platform}/{user_id}" method="post">
                 <label>Creativity: <input type="text" name="creativity" value="0.7" /></label><br/>
                 <label>Instructions: <input type="text" name="instructions" value="Be polite" /></label><br/>
+                <label>Engine:
+                    <select name="engine">
+                        <option value="assistants">Assistants (OpenAI threads)</option>
+                        <option value="chat">Chat Completions (local history)</option>
+                    </select>
+                </label><br/>
                 <button type="submit">Create Bot</button>
             </form>
         </body>
@@ -51,6 +61,9 @@ async def create_bot_for_user(
     form_data = await request.form()
     creativity_str = form_data.get("creativity", "0.7")
     instructions = form_data.get("instructions", "Be polite")
+    engine = form_data.get("engine", "assistants")
+    if engine not in ("assistants", "chat"):
+        raise HTTPException(status_code=400, detail="Invalid engine. Must be 'assistants' or 'chat'.")
 
     try:
         creativity = float(creativity_str)
@@ -77,14 +90,22 @@ async def create_bot_for_user(
     if not user:
         logger.error(f"User with user_id={user_id} not found for platform={platform}")
         raise HTTPException(status_code=404, detail="User not found")
+    previous_assistant_id = user.bot_id
 
     try:
-        assistant_id = create_assistant_in_openai(
-            name=f"My {platform} Bot",
-            instructions=instructions,
-            creativity=creativity,
-        )
-        logger.info(f"Assistant created with ID: {assistant_id}")
+        if engine == "chat":
+            # Chat Completions bots live only in our database
+            assistant_id = f"chat_{uuid.uuid4().hex}"
+            model = CHAT_COMPLETIONS_MODEL
+        else:
+            assistant_id = await create_assistant_in_openai(
+                name=f"My {platform} Bot",
+                instructions=instructions,
+                creativity=creativity,
+            )
+            model = "gpt-3.5-turbo"
+        await save_bot(db, assistant_id, engine, model, instructions, creativity)
+        logger.info(f"Assistant created with ID: {assistant_id}, engine: {engine}")
     except Exception as e:
         logger.error(f"Failed to create assistant: {e}")
         raise HTTPException(status_code=500, detail="Failed to create assistant")
@@ -108,6 +129,9 @@ async def create_bot_for_user(
         logger.error(f"Failed to update bot ID for user_id={user_id} on platform={platform}")
         raise HTTPException(status_code=500, detail="Failed to update bot ID")
 
+    invalidate_assistant_cache(previous_assistant_id, assistant_id)
+    invalidate_bot_settings_cache(previous_assistant_id, assistant_id)
+
     logger.info(
         f"Assistant created for user_id={user_id}, platform={platform}, with assistant_id={assistant_id}, "
         f"creativity={creativity}, instructions={instructions}"
@@ -119,6 +143,7 @@ async def create_bot_for_user(
         "assistant_id": assistant_id,
         "creativity": creativity,
         "instructions": instructions,
+        "engine": engine,
         "status": "success",
     }
 
@@ -0,0 +1,102 @@
+import asyncio
+import logging
+
+from src.bots.openai.assistant_manager import AssistantManager
+from src.core.config import OPENAI_RUN_DEADLINE
+from src.utils.errors_handler import AssistantRunError
+from src.utils.metrics import register_metrics
+
+
+logger = logging.getLogger(__name__)
+
+
+class RunSupervisor:
+    """
+    Runs the assistant under a deadline and makes sure no run is left active on its thread.
+    """
+
+    def __init__(self, deadline: float = OPENAI_RUN_DEADLINE) -> None:
+        self.deadline = deadline
+        self.in_flight = 0
+        # Cancellations outliving their caller; referenced here so they are not garbage-collected
+        self._cancels: set[asyncio.Task] = set()
+        self.stats = {
+            "runs": 0,
+            "completed": 0,
+            "failed": 0,
+            "requires_action": 0,
+            "expired": 0,
+            "cancelled_upstream": 0,
+            "stuck": 0,
+            "cancelled": 0,
+            "cancel_errors": 0,
+        }
+
+    def snapshot(self) -> dict:
+        return {**self.stats, "in_flight": self.in_flight, "cancelling": len(self._cancels)}
+
+    async def execute(self, manager: AssistantManager, instructions: str, message: str = None):
+        """
+        Start a run and wait for its response, cancelling it if it overruns the deadline
+        or stops in a state we cannot complete. When a message is given it is sent
+        together with the run request.
+        """
+        self.stats["runs"] += 1
+        self.in_flight += 1
+        try:
+            async with asyncio.timeout(self.deadline):
+                if message is None:
+                    await manager.run_assistant(instructions=instructions)
+                else:
+                    await manager.run_with_message(message, instructions=instructions)
+                response = await manager.wait_for_completion()
+            self.stats["completed"] += 1
+            return response
+        except TimeoutError:
+            self.stats["stuck"] += 1
+            logger.error(f"Run {manager.run.id if manager.run else None} exceeded the {self.deadline}s deadline")
+            await self._cancel(manager)
+            raise AssistantRunError(f"Run exceeded the {self.deadline}s deadline.", status="timeout")
+        except AssistantRunError as e:
+            if e.status == "requires_action":
+                self.stats["requires_action"] += 1
+                await self._cancel(manager)
+            elif e.status == "cancelled":
+                self.stats["cancelled_upstream"] += 1
+            elif e.status == "expired":
+                self.stats["expired"] += 1
+            else:
+                self.stats["failed"] += 1
+            raise
+        except asyncio.CancelledError:
+            # The caller went away, do not leave the run locking the thread
+            if manager.run is not None:
+                task = asyncio.create_task(self._cancel(manager))
+                self._cancels.add(task)
+                task.add_done_callback(self._cancels.discard)
+            raise
+        finally:
+            self.in_flight -= 1
+
+    async def drain(self, timeout: float = 5):
+        """
+        Wait up to timeout seconds for cancellations started on behalf of cancelled callers.
+        """
+        if self._cancels:
+            await asyncio.wait(set(self._cancels), timeout=timeout)
+
+    async def _cancel(self, manager: AssistantManager):
+        if manager.run is None:
+            return
+        try:
+            await manager.cancel_run()
+            self.stats["cancelled"] += 1
+        except Exception as e:
+            # The run may have reached a final status in the meantime
+            self.stats["cancel_errors"] += 1
+            logger.warning(f"Failed to cancel run {manager.run.id}: {e}")
+
+
+run_supervisor = RunSupervisor()
+
+register_metrics("run_supervisor", run_supervisor.snapshot)
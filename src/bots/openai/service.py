@@ -1,15 +1,80 @@
 # src/bot/message_handler.py
-from sys import platform
-
 from sqlalchemy.ext.asyncio import AsyncSession
 from src.db.repositories.thread_repositories import get_thread, save_thread
+from src.db.repositories.bot_repositories import get_bot
 from src.bots.openai.assistant_manager import AssistantManager
+from src.bots.openai.chat_engine import ChatCompletionEngine
+from src.bots.openai.conversation_queue import conversation_queue
+from src.bots.openai.message_coalescer import message_coalescer
+from src.bots.openai.run_supervisor import run_supervisor
+from src.core.config import ASSISTANT_CACHE_SIZE, ASSISTANT_CACHE_TTL
+from src.utils.cache import TTLCache, MISSING
+from src.utils.metrics import register_metrics
 import logging
 
 logger = logging.getLogger(__name__)
 
+# bot_id -> engine settings dict, or None for bots without stored settings
+bot_settings_cache = TTLCache(maxsize=ASSISTANT_CACHE_SIZE, ttl=ASSISTANT_CACHE_TTL)
+
+register_metrics("bot_settings_cache", bot_settings_cache.stats)
+
+
+async def get_bot_settings(db: AsyncSession, bot_id: str):
+    """
+    Return the stored engine settings of a bot, cached in-process.
+    """
+    settings = bot_settings_cache.get(bot_id, MISSING)
+    if settings is MISSING:
+        bot = await get_bot(db, bot_id)
+        settings = None
+        if bot is not None:
+            settings = {
+                "engine": bot.engine,
+                "model": bot.model,
+                "instructions": bot.instructions,
+                "temperature": bot.temperature,
+            }
+        bot_settings_cache.set(bot_id, settings)
+    return settings
+
+
+def invalidate_bot_settings_cache(*bot_ids: str):
+    for bot_id in bot_ids:
+        if bot_id:
+            bot_settings_cache.invalidate(bot_id)
+
 
 async def handle_incoming_message(
+    db: AsyncSession,
+    sender_id: str,
+    owner_id: str,
+    assistant_id: str,
+    message: str,
+    platform: str,
+    coalesce: bool = True,
+):
+    """
+    Queue the message behind the earlier messages of the same conversation and return the reply.
+    Conversations are processed in parallel up to CONVERSATION_MAX_CONCURRENCY.
+    Messages sent within MESSAGE_COALESCE_WINDOW_MS of each other are answered by one run;
+    only the last of them gets the reply, the others return response=None and coalesced=True.
+    Pass coalesce=False when the caller already merged the conversation's messages.
+    """
+    key = (platform, str(owner_id), str(sender_id))
+
+    async def flush(merged_message: str):
+        return await conversation_queue.submit(
+            key,
+            lambda: reply_to_message(db, sender_id, owner_id, assistant_id, merged_message, platform),
+        )
+
+    if not coalesce:
+        return await flush(message)
+    return await message_coalescer.submit(key, message, flush)
+
+
+async def reply_to_message(
     db: AsyncSession,
     sender_id: str,
     owner_id: str,
@@ -20,54 +85,102 @@ async def handle_incoming_message(
     """
     Handles incoming messages:
     1. Check if a thread exists for sender_id and owner_id.
-    2. Create a new thread if none exists.
-    3. Forward the message to OpenAI and wait for the assistant's response.
+    2. New conversation: create the thread with the message and run it in one request (create_and_run).
+       Existing conversation: start a run that carries the message as an additional message.
+    3. Wait for the assistant's response.
+    Bots configured with the "chat" engine are answered by ChatCompletionEngine instead.
     """
     try:
+        settings = await get_bot_settings(db, assistant_id)
+        if settings and settings["engine"] == "chat":
+            return await reply_with_chat_completions(db, sender_id, owner_id, assistant_id, settings, message, platform)
+
         # Step 1: Initialize AssistantManager with the assistant_id
         assistant_manager = AssistantManager()
-        assistant_manager.set_assistant(assistant_id)
+        await assistant_manager.set_assistant(assistant_id)
 
         # Step 2: Check for existing thread in the database
-        thread = await get_thread(db, str(sender_id), str(owner_id), platform)
-
-        if not thread:
-            # Step 3: Create a new thread using AssistantManager
-            thread_id = assistant_manager.create_thread()
+        thread_id = await get_thread(db, str(sender_id), str(owner_id), platform)
+        if thread_id:
+            assistant_manager.set_thread(thread_id)
+            logger.info(f"Reusing existing thread with ID={thread_id} for sender_id={str(sender_id)}.")
+        run_path = "run_with_message" if thread_id else "create_and_run"
 
-            # Save the new thread in the database
-            thread = await save_thread(db, str(sender_id), str(owner_id), assistant_id, thread_id, platform)
-            logger.info(f"New thread created and saved for sender_id={str(sender_id)}, owner_id={str(owner_id)}.")
-        else:
-            # Step 4: Reuse the existing thread
-            assistant_manager.set_thread(thread.thread_id)
-            logger.info(f"Reusing existing thread with ID={thread.thread_id} for sender_id={str(sender_id)}.")
+        # Step 3: Send the message and run in a single request, under the supervisor
+        try:
+            result = await run_supervisor.execute(
+                assistant_manager,
+                instructions="Generate a response based on the conversation context.",
+                message=message,
+            )
+        finally:
+            if not thread_id and assistant_manager.thread_id:
+                # Keep the new thread even if the run failed, it already holds the user's message
+                saved_thread_id = await save_thread(
+                    db, str(sender_id), str(owner_id), assistant_id, assistant_manager.thread_id, platform
+                )
+                if saved_thread_id != assistant_manager.thread_id:
+                    logger.warning(
+                        f"Thread {assistant_manager.thread_id} lost the race for sender_id={str(sender_id)}, "
+                        f"owner_id={str(owner_id)}; the conversation continues on thread {saved_thread_id}."
+                    )
+                else:
+                    logger.info(f"New thread created and saved for sender_id={str(sender_id)}, owner_id={str(owner_id)}.")
 
-        # Step 5: Add the incoming message to the thread
-        assistant_manager.add_message_to_thread(role="user", content=message)
-        logger.info(f"Message added to thread ID={assistant_manager.thread_id}: {message}")
-
-        # Step 6: Run the assistant and wait for completion
-        assistant_manager.run_assistant(instructions="Generate a response based on the conversation context.")
-        response = assistant_manager.wait_for_completion()
+        logger.info(
+            f"Reply for thread ID={assistant_manager.thread_id} via {run_path} "
+            f"took {assistant_manager.api_calls} upstream calls"
+        )
 
         return {
             "thread_id": assistant_manager.thread_id,
-            "response": response
+            "response": result["response"],
+            "usage": result["usage"],
+            "poll_calls": assistant_manager.poll_calls,
+            "run_path": run_path,
+            "upstream_calls": assistant_manager.api_calls,
         }
     except Exception as e:
-        logger.error(f"Error in handle_incoming_message: {e}")
+        logger.error(f"Error in reply_to_message: {e}")
         raise
 
 
 
-def create_assistant_in_openai(name: str, instructions: str, creativity: float) -> str:
+async def reply_with_chat_completions(
+    db: AsyncSession,
+    sender_id: str,
+    owner_id: str,
+    bot_id: str,
+    settings: dict,
+    message: str,
+    platform: str
+):
+    """
+    Answer with one Chat Completions request, using the history stored in our database.
+    """
+    engine = ChatCompletionEngine(
+        model=settings["model"],
+        instructions=settings["instructions"],
+        temperature=settings["temperature"],
+    )
+    result = await engine.reply(db, str(sender_id), str(owner_id), platform, bot_id, message)
+    return {
+        "thread_id": None,
+        "response": result["response"],
+        "usage": result["usage"],
+        "poll_calls": 0,
+        "run_path": "chat_completions",
+        "upstream_calls": 1,
+    }
+
+
+async def create_assistant_in_openai(name: str, instructions: str, creativity: float) -> str:
     """
     Создаёт ассистента в OpenAI через AssistantManager и возвращает assistant_id.
     Параметр 'creativity' можно где-то учесть, например, менять model или instructions.
     """
     manager = AssistantManager(model="gpt-3.5-turbo")  # или другой
-    assistant_id = manager.create_assistant(
+    assistant_id = await manager.create_assistant(
         name=name,
         instructions=instructions,
         tools=[]  # передайте, если нужны
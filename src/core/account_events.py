@@ -0,0 +1,68 @@
+import asyncio
+import json
+import logging
+import time
+from typing import Callable
+
+from src.core.redis_setup import get_async_redis, get_sync_redis
+
+
+logger = logging.getLogger(__name__)
+
+ACCOUNT_CHANGES_CHANNEL = "account_changes"
+PUBLISH_ATTEMPTS = 3
+
+# Called with (platform, account_id) in the writing process itself, before the change is published,
+# so that process never routes with the old data even if publishing fails
+local_change_handlers: list[Callable[[str, str], None]] = []
+
+
+def _change(platform: str, account_id) -> str:
+    return json.dumps({"platform": platform, "account_id": str(account_id)})
+
+
+def _notify_local(platform: str, account_id):
+    for handler in local_change_handlers:
+        try:
+            handler(platform, str(account_id))
+        except Exception as e:
+            logger.warning(f"Local handler of {platform} account {account_id} change failed: {e}")
+
+
+def _publish_failed(platform: str, account_id, error: Exception):
+    logger.error(
+        f"Publishing change of {platform} account {account_id} failed after {PUBLISH_ATTEMPTS} attempts, "
+        f"other processes may route it with old data until their entry expires: {error}"
+    )
+
+
+async def publish_account_changed(platform: str, account_id):
+    """
+    Tell every process that the routing data (tokens, bot_id) of an account changed.
+    """
+    _notify_local(platform, account_id)
+    for attempt in range(PUBLISH_ATTEMPTS):
+        try:
+            await get_async_redis().publish(ACCOUNT_CHANGES_CHANNEL, _change(platform, account_id))
+            return
+        except Exception as e:
+            error = e
+            if attempt < PUBLISH_ATTEMPTS - 1:
+                await asyncio.sleep(0.1 * 2 ** attempt)
+    _publish_failed(platform, account_id, error)
+
+
+def publish_account_changed_sync(platform: str, account_id):
+    """
+    Same as publish_account_changed, for sync code such as Celery tasks.
+    """
+    _notify_local(platform, account_id)
+    for attempt in range(PUBLISH_ATTEMPTS):
+        try:
+            get_sync_redis().publish(ACCOUNT_CHANGES_CHANNEL, _change(platform, account_id))
+            return
+        except Exception as e:
+            error = e
+            if attempt < PUBLISH_ATTEMPTS - 1:
+                time.sleep(0.1 * 2 ** attempt)
+    _publish_failed(platform, account_id, error)
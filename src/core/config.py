@@ -10,4 +10,109 @@ SYNC_DATABASE_URL = os.getenv("SYNC_DATABASE_URL")
 REDIS = os.getenv("REDIS")
 EXTERNAL_LIBRARY_LEVEL_LOG = os.getenv("EXTERNAL_LIBRARY_LEVEL_LOG")
 LOG_LEVEL = os.getenv("LOG_LEVEL")
+
+# Log records are written to the logs table in batches by a background thread.
+# When the buffer is LOG_DB_SAMPLE_WATERMARK full, the "sample" overflow policy keeps
+# one in LOG_DB_SAMPLE_RATE records below WARNING; a full buffer drops new records.
+LOG_DB_QUEUE_SIZE = int(os.getenv("LOG_DB_QUEUE_SIZE", "10000"))
+LOG_DB_BATCH_SIZE = int(os.getenv("LOG_DB_BATCH_SIZE", "500"))
+LOG_DB_FLUSH_INTERVAL = float(os.getenv("LOG_DB_FLUSH_INTERVAL", "1"))
+LOG_DB_OVERFLOW = os.getenv("LOG_DB_OVERFLOW", "sample")
+LOG_DB_SAMPLE_WATERMARK = float(os.getenv("LOG_DB_SAMPLE_WATERMARK", "0.8"))
+LOG_DB_SAMPLE_RATE = int(os.getenv("LOG_DB_SAMPLE_RATE", "10"))
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+
+# Assistants run completion: "stream" consumes the run event stream, "poll" polls runs.retrieve
+OPENAI_RUN_COMPLETION_MODE = os.getenv("OPENAI_RUN_COMPLETION_MODE", "stream")
+OPENAI_POLL_INITIAL_INTERVAL = float(os.getenv("OPENAI_POLL_INITIAL_INTERVAL", "0.25"))
+OPENAI_POLL_MAX_INTERVAL = float(os.getenv("OPENAI_POLL_MAX_INTERVAL", "2.0"))
+OPENAI_POLL_BACKOFF_FACTOR = float(os.getenv("OPENAI_POLL_BACKOFF_FACTOR", "1.5"))
+OPENAI_RUN_DEADLINE = float(os.getenv("OPENAI_RUN_DEADLINE", "60"))
+ASSISTANT_CACHE_SIZE = int(os.getenv("ASSISTANT_CACHE_SIZE", "1024"))
+ASSISTANT_CACHE_TTL = float(os.getenv("ASSISTANT_CACHE_TTL", "300"))
+
+# Chat Completions reply engine
+CHAT_COMPLETIONS_MODEL = os.getenv("CHAT_COMPLETIONS_MODEL", "gpt-3.5-turbo")
+CHAT_HISTORY_TOKEN_BUDGET = int(os.getenv("CHAT_HISTORY_TOKEN_BUDGET", "3000"))
+CHAT_HISTORY_MAX_MESSAGES = int(os.getenv("CHAT_HISTORY_MAX_MESSAGES", "50"))
+
+# Conversation thread-id cache (in-process LRU in front of Redis)
+THREAD_CACHE_SIZE = int(os.getenv("THREAD_CACHE_SIZE", "10000"))
+THREAD_CACHE_TTL = float(os.getenv("THREAD_CACHE_TTL", "3600"))
+THREAD_CACHE_REDIS_TTL = int(os.getenv("THREAD_CACHE_REDIS_TTL", "604800"))
+
+# Per-sender conversation queue
+CONVERSATION_MAX_CONCURRENCY = int(os.getenv("CONVERSATION_MAX_CONCURRENCY", "50"))
+CONVERSATION_IDLE_TIMEOUT = float(os.getenv("CONVERSATION_IDLE_TIMEOUT", "60"))
+
+# Merge messages a sender fires within this window into one run (0 disables); applies
+# to the in-process reply workers and to the queued entries of the stream consumer
+MESSAGE_COALESCE_WINDOW_MS = int(os.getenv("MESSAGE_COALESCE_WINDOW_MS", "0"))
+MESSAGE_COALESCE_MAX_WAIT_MS = int(os.getenv("MESSAGE_COALESCE_MAX_WAIT_MS", "5000"))
+
+# Background reply workers used by the webhook handlers
+REPLY_WORKERS = int(os.getenv("REPLY_WORKERS", "100"))
+REPLY_QUEUE_SIZE = int(os.getenv("REPLY_QUEUE_SIZE", "10000"))
+
+# Inbound webhook/event deduplication by platform message id
+INBOUND_DEDUP_TTL = int(os.getenv("INBOUND_DEDUP_TTL", "86400"))
+INBOUND_DEDUP_CACHE_SIZE = int(os.getenv("INBOUND_DEDUP_CACHE_SIZE", "100000"))
+
+# Durable inbound event stream (Redis Streams), partitioned by conversation
+INBOUND_STREAM_PARTITIONS = int(os.getenv("INBOUND_STREAM_PARTITIONS", "8"))
+INBOUND_STREAM_MAXLEN = int(os.getenv("INBOUND_STREAM_MAXLEN", "100000"))
+INBOUND_STREAM_BATCH = int(os.getenv("INBOUND_STREAM_BATCH", "50"))
+INBOUND_STREAM_BLOCK_MS = int(os.getenv("INBOUND_STREAM_BLOCK_MS", "2000"))
+INBOUND_STREAM_CLAIM_IDLE_MS = int(os.getenv("INBOUND_STREAM_CLAIM_IDLE_MS", "60000"))
+INBOUND_STREAM_MAX_DELIVERIES = int(os.getenv("INBOUND_STREAM_MAX_DELIVERIES", "5"))
+INBOUND_STREAM_LEASE_MS = int(os.getenv("INBOUND_STREAM_LEASE_MS", "15000"))
+# Entries read from a partition and not yet acknowledged, across its conversations
+INBOUND_STREAM_BUFFER = int(os.getenv("INBOUND_STREAM_BUFFER", "500"))
+# A failed entry is retried in place, holding back the rest of its conversation, and
+# moved to the dead-letter stream after INBOUND_STREAM_MAX_DELIVERIES attempts
+INBOUND_STREAM_RETRY_BACKOFF = float(os.getenv("INBOUND_STREAM_RETRY_BACKOFF", "1"))
+# Consume the shared partitions inside the web process; disable when running them standalone.
+# Per-account streams (Telegram) are always read by the process holding the account's client.
+INBOUND_CONSUMER_ENABLED = os.getenv("INBOUND_CONSUMER_ENABLED", "true").lower() == "true"
+
+# Concurrency cap across senders, for a webhook batch and for the conversations of a stream partition
+INBOUND_BATCH_CONCURRENCY = int(os.getenv("INBOUND_BATCH_CONCURRENCY", "16"))
+
+# Account routing registry (tokens and bot_id per connected account)
+ACCOUNT_REGISTRY_SIZE = int(os.getenv("ACCOUNT_REGISTRY_SIZE", "100000"))
+ACCOUNT_REGISTRY_TTL = int(os.getenv("ACCOUNT_REGISTRY_TTL", "3600"))
+ACCOUNT_REGISTRY_MISS_TTL = int(os.getenv("ACCOUNT_REGISTRY_MISS_TTL", "60"))
+# Entry lifetime while the account change subscription is down and changes may be missed
+ACCOUNT_REGISTRY_DEGRADED_TTL = int(os.getenv("ACCOUNT_REGISTRY_DEGRADED_TTL", "30"))
+
+# How often a cached app config (instagram_app, telegram_app) checks Redis for a newer version
+APP_CONFIG_CHECK_INTERVAL = float(os.getenv("APP_CONFIG_CHECK_INTERVAL", "30"))
+
+# Shared outbound HTTP clients, one keep-alive pool per upstream host
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "20"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "60"))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "20"))
+HTTP_POOL_TIMEOUT = float(os.getenv("HTTP_POOL_TIMEOUT", "5"))
+HTTP2_ENABLED = os.getenv("HTTP2_ENABLED", "false").lower() == "true"
+
+# Outbound Green API sends, per instance. The default rate matches the
+# delaySendMessagesMilliseconds of 1000 that set_settings configures.
+WHATSAPP_SEND_RATE = float(os.getenv("WHATSAPP_SEND_RATE", "1"))
+WHATSAPP_SEND_BURST = int(os.getenv("WHATSAPP_SEND_BURST", "1"))
+WHATSAPP_SEND_QUEUE_SIZE = int(os.getenv("WHATSAPP_SEND_QUEUE_SIZE", "1000"))
+WHATSAPP_SEND_RETRIES = int(os.getenv("WHATSAPP_SEND_RETRIES", "4"))
+WHATSAPP_SEND_BACKOFF = float(os.getenv("WHATSAPP_SEND_BACKOFF", "1"))
+WHATSAPP_SEND_MAX_BACKOFF = float(os.getenv("WHATSAPP_SEND_MAX_BACKOFF", "30"))
+
+# Instagram Graph API usage (percent of the limit, from the X-App-Usage and
+# X-Business-Use-Case-Usage headers): sends slow down from GRAPH_USAGE_SLOWDOWN,
+# spaced by up to GRAPH_USAGE_MAX_DELAY seconds, and wait from GRAPH_USAGE_LIMIT.
+GRAPH_USAGE_SLOWDOWN = float(os.getenv("GRAPH_USAGE_SLOWDOWN", "75"))
+GRAPH_USAGE_LIMIT = float(os.getenv("GRAPH_USAGE_LIMIT", "95"))
+GRAPH_USAGE_MAX_DELAY = float(os.getenv("GRAPH_USAGE_MAX_DELAY", "5"))
+GRAPH_USAGE_STALE = int(os.getenv("GRAPH_USAGE_STALE", "60"))
+GRAPH_THROTTLE_BACKOFF = int(os.getenv("GRAPH_THROTTLE_BACKOFF", "60"))
+INSTAGRAM_SEND_QUEUE_SIZE = int(os.getenv("INSTAGRAM_SEND_QUEUE_SIZE", "1000"))
+INSTAGRAM_SEND_RETRIES = int(os.getenv("INSTAGRAM_SEND_RETRIES", "3"))
@@ -0,0 +1,108 @@
+import logging
+import time
+
+import httpx
+
+from src.core.config import (
+    HTTP_MAX_CONNECTIONS,
+    HTTP_MAX_KEEPALIVE_CONNECTIONS,
+    HTTP_KEEPALIVE_EXPIRY,
+    HTTP_CONNECT_TIMEOUT,
+    HTTP_READ_TIMEOUT,
+    HTTP_POOL_TIMEOUT,
+    HTTP2_ENABLED,
+)
+from src.utils.metrics import register_metrics, LatencyRecorder
+
+
+logger = logging.getLogger(__name__)
+
+GRAPH_INSTAGRAM = "https://graph.instagram.com"
+INSTAGRAM_API = "https://api.instagram.com"
+
+
+class HttpClientRegistry:
+    """
+    One long-lived httpx.AsyncClient per upstream host, so outbound calls reuse
+    keep-alive (and optionally HTTP/2) connections instead of paying DNS, TCP and
+    TLS setup on every request.
+    """
+
+    def __init__(self) -> None:
+        self._clients: dict[str, httpx.AsyncClient] = {}
+        self._response_hooks: dict[str, list] = {}
+        self.latency = LatencyRecorder()
+        self.stats: dict[str, dict] = {}
+
+    def snapshot(self) -> dict:
+        snapshot = {}
+        for host, client in self._clients.items():
+            # httpx keeps its connection pool on the transport; report it when available
+            pool = getattr(getattr(client, "_transport", None), "_pool", None)
+            snapshot[host] = {
+                **self.stats[host],
+                "open_connections": len(pool.connections) if pool is not None else None,
+                "latency": self.latency.snapshot().get(host),
+            }
+        return snapshot
+
+    def get(self, base_url: str) -> httpx.AsyncClient:
+        """
+        Return the shared client for a scheme://host base URL, creating it on first use.
+        """
+        client = self._clients.get(base_url)
+        if client is None or client.is_closed:
+            client = self._clients[base_url] = self._create(base_url)
+        return client
+
+    def add_response_hook(self, base_url: str, hook):
+        """
+        Run an async hook(response) on every response of the client for base_url, e.g. to read rate limit headers.
+        """
+        self._response_hooks.setdefault(base_url, []).append(hook)
+        client = self._clients.get(base_url)
+        if client is not None:
+            client.event_hooks["response"].append(hook)
+
+    def _create(self, base_url: str) -> httpx.AsyncClient:
+        self.stats.setdefault(base_url, {"requests": 0, "errors": 0})
+
+        async def on_request(request: httpx.Request):
+            request.extensions["started_at"] = time.perf_counter()
+            self.stats[base_url]["requests"] += 1
+
+        async def on_response(response: httpx.Response):
+            started_at = response.request.extensions.get("started_at")
+            if started_at is not None:
+                self.latency.record(base_url, time.perf_counter() - started_at)
+            if response.status_code >= 400:
+                self.stats[base_url]["errors"] += 1
+
+        logger.info(f"Opening shared HTTP client for {base_url} (http2={HTTP2_ENABLED})")
+        return httpx.AsyncClient(
+            base_url=base_url,
+            http2=HTTP2_ENABLED,
+            limits=httpx.Limits(
+                max_connections=HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+            ),
+            timeout=httpx.Timeout(
+                HTTP_READ_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT, pool=HTTP_POOL_TIMEOUT
+            ),
+            event_hooks={"request": [on_request], "response": [on_response, *self._response_hooks.get(base_url, [])]},
+        )
+
+    def open(self, *base_urls: str):
+        for base_url in base_urls:
+            self.get(base_url)
+
+    async def aclose(self):
+        for client in self._clients.values():
+            await client.aclose()
+        self._clients.clear()
+
+
+http_clients = HttpClientRegistry()
+
+register_metrics("http_clients", http_clients.snapshot)
@@ -0,0 +1,27 @@
+import redis
+import redis.asyncio as aioredis
+
+from src.core.config import REDIS
+
+_async_client = None
+_sync_client = None
+
+
+def get_async_redis() -> aioredis.Redis:
+    """
+    Return the process-wide asyncio Redis client (the same Redis Celery uses).
+    """
+    global _async_client
+    if _async_client is None:
+        _async_client = aioredis.from_url(REDIS, decode_responses=True)
+    return _async_client
+
+
+def get_sync_redis() -> redis.Redis:
+    """
+    Return the process-wide blocking Redis client, for sync code such as Celery tasks.
+    """
+    global _sync_client
+    if _sync_client is None:
+        _sync_client = redis.from_url(REDIS, decode_responses=True)
+    return _sync_client
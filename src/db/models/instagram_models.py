@@ -19,7 +19,7 @@ class InstagramUser(Base):
     __tablename__ = "instagram_users"
 
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(String(255), nullable=False)
+    user_id = Column(String(255), nullable=False, index=True)
     access_token = Column(Text, nullable=False)
     username = Column(String(255), nullable=True)
     bot_id = Column(String, nullable=True)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, Boolean, create_engine, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, Boolean, Text, TIMESTAMP, Index, create_engine, ForeignKey, func
 from src.core.database_setup import Base
 
 
@@ -17,3 +17,33 @@ class Thread(Base):
     owner_id = Column(String, nullable=False)
     assistant_id = Column(String, nullable=False)
     platform = Column(String, nullable=False)
+
+    __table_args__ = (
+        Index("ux_threads_sender_owner_platform", "sender_id", "owner_id", "platform", unique=True),
+    )
+
+class Bot(Base):
+    __tablename__ = "bots"
+
+    bot_id = Column(String, primary_key=True)
+    engine = Column(String(20), nullable=False, default="assistants")  # "assistants" or "chat"
+    model = Column(String, nullable=False)
+    instructions = Column(Text, nullable=True)
+    temperature = Column(Float, nullable=True)
+    created_at = Column(TIMESTAMP, server_default=func.now(), nullable=False)
+
+class ConversationMessage(Base):
+    __tablename__ = "conversation_messages"
+
+    id = Column(Integer, primary_key=True)
+    sender_id = Column(String, nullable=False)
+    owner_id = Column(String, nullable=False)
+    platform = Column(String, nullable=False)
+    bot_id = Column(String, nullable=True)  # Null for messages stored before history was kept per bot
+    role = Column(String(20), nullable=False)
+    content = Column(Text, nullable=False)
+    created_at = Column(TIMESTAMP, server_default=func.now(), nullable=False)
+
+    __table_args__ = (
+        Index("ix_conversation_messages_conversation", "sender_id", "owner_id", "platform", "bot_id", "id"),
+    )
@@ -24,7 +24,7 @@ class TelegramUser(Base):
     session = Column(String, nullable=True)  # Will be None until logged in
     phone_number = Column(String, nullable=False, unique=True)
     username = Column(String, nullable=True)
-    user_id = Column(String, nullable=True)
+    user_id = Column(String, nullable=True, index=True)
     phone_code_hash = Column(String, nullable=True)  # New column for code hash storage
     bot_id = Column(String, nullable=True)
 
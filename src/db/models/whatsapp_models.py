@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Boolean, BigInteger
+from sqlalchemy import Column, Integer, String, ForeignKey, Boolean, BigInteger, Text, TIMESTAMP, func
 from sqlalchemy.orm import relationship, declarative_base
 from src.core.database_setup import Base
 
@@ -15,3 +15,16 @@ class WhatsAppUser(Base):
     order_id = Column(String, nullable=False)
     bot_id = Column(String, nullable=True, unique=True)
 
+
+class WhatsAppDeadLetter(Base):
+    """Outbound message Green API did not accept after all retries."""
+    __tablename__ = 'whatsapp_dead_letters'
+
+    id = Column(Integer, primary_key=True, index=True)
+    id_instance = Column(BigInteger, nullable=False, index=True)
+    chat_id = Column(String, nullable=False)
+    message = Column(Text, nullable=False)
+    attempts = Column(Integer, nullable=False)
+    status_code = Column(Integer, nullable=True)
+    error = Column(Text, nullable=True)
+    created_at = Column(TIMESTAMP, server_default=func.now(), nullable=False)
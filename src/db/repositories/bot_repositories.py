@@ -0,0 +1,26 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.db.models.openai_models import Bot
+
+
+async def save_bot(db: AsyncSession, bot_id: str, engine: str, model: str, instructions: str, temperature: float) -> Bot:
+    """
+    Create or update the settings of a bot.
+    """
+    bot = await db.get(Bot, bot_id)
+    if bot is None:
+        bot = Bot(bot_id=bot_id)
+        db.add(bot)
+    bot.engine = engine
+    bot.model = model
+    bot.instructions = instructions
+    bot.temperature = temperature
+    await db.commit()
+    return bot
+
+
+async def get_bot(db: AsyncSession, bot_id: str):
+    """
+    Fetch the settings of a bot by bot_id. Bots created before settings were stored return None.
+    """
+    return await db.get(Bot, bot_id)
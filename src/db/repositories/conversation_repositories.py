@@ -0,0 +1,36 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from src.db.models.openai_models import ConversationMessage
+
+
+async def get_recent_messages(db: AsyncSession, sender_id: str, owner_id: str, platform: str, bot_id: str, limit: int):
+    """
+    Fetch the latest `limit` messages of a conversation with a bot, oldest first.
+    """
+    statement = (
+        select(ConversationMessage.role, ConversationMessage.content)
+        .where(
+            ConversationMessage.sender_id == sender_id,
+            ConversationMessage.owner_id == owner_id,
+            ConversationMessage.platform == platform,
+            ConversationMessage.bot_id == bot_id,
+        )
+        .order_by(ConversationMessage.id.desc())
+        .limit(limit)
+    )
+    result = await db.execute(statement)
+    return list(reversed(result.all()))
+
+
+async def add_messages(db: AsyncSession, sender_id: str, owner_id: str, platform: str, bot_id: str, messages: list[tuple[str, str]]):
+    """
+    Append (role, content) messages to a conversation with a bot in a single commit.
+    """
+    db.add_all([
+        ConversationMessage(
+            sender_id=sender_id, owner_id=owner_id, platform=platform, bot_id=bot_id, role=role, content=content
+        )
+        for role, content in messages
+    ])
+    await db.commit()
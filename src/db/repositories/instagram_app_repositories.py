@@ -2,7 +2,9 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from src.db.models.instagram_models import InstagramApp
+from src.utils.config_cache import VersionedConfig
 
+instagram_app_config = VersionedConfig("instagram_app")
 
 
 class InstagramCredentials:
@@ -38,6 +40,14 @@ class InstagramCredentials:
         }
 
 
+async def _get_cached_credentials(db: AsyncSession):
+    async def load():
+        app = await db.get(InstagramApp, 1)  # Fetch the single row with ID = 1
+        return InstagramCredentials(app) if app is not None else None
+
+    return await instagram_app_config.get(load)
+
+
 async def get_instagram_credentials(db: AsyncSession, return_type="all"):
     """
     Fetch Instagram credentials with flexible return types.
@@ -46,12 +56,10 @@ async def get_instagram_credentials(db: AsyncSession, return_type="all"):
     :param return_type: "all" for all details, "credentials" for app_id and app_secret only
     :return: InstagramCredentials instance or subset of details
     """
-    app = await db.get(InstagramApp, 1)  # Fetch the single row with ID = 1
-    if app is None:
+    credentials = await _get_cached_credentials(db)
+    if credentials is None:
         return None
 
-    credentials = InstagramCredentials(app)
-
     if return_type == "credentials":
         return credentials.credentials
     elif return_type == "webhook_details":
@@ -91,6 +99,7 @@ def set_app_details(db: Session,
 
     print("webhook details set to db")
     db.commit()
+    instagram_app_config.invalidate_sync()
 
 
 def set_app_verify_token(db: AsyncSession, webhook_verify_token: str):
@@ -101,11 +110,12 @@ def set_app_verify_token(db: AsyncSession, webhook_verify_token: str):
     else:
         app.webhook_verify_token = webhook_verify_token
     db.commit()
+    instagram_app_config.invalidate_sync()
 
 
 async def get_app_verify_token(db: AsyncSession):
-    app = await db.get(InstagramApp, 1)
-    if app:
-        return app.webhook_verify_token
+    credentials = await _get_cached_credentials(db)
+    if credentials:
+        return credentials.webhook_verify_token
     return None
 
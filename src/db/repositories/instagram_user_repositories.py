@@ -1,6 +1,7 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 
+from src.core.account_events import publish_account_changed
 from src.db.models.instagram_models import InstagramUser
 
 
@@ -18,6 +19,7 @@ async def create_instagram_account(db: AsyncSession, username, user_id, access_t
         user.access_token = access_token
         user.bot_id = bot_id
     await db.commit()
+    await publish_account_changed("instagram", user_id)
 
 async def get_instagram_account_user_by_id(db: AsyncSession, user_id):
     statement = select(InstagramUser).where(InstagramUser.user_id == user_id)
@@ -25,6 +27,18 @@ async def get_instagram_account_user_by_id(db: AsyncSession, user_id):
     user = result.scalars().first()
     return user
 
+async def get_instagram_accounts_by_ids(db: AsyncSession, user_ids) -> dict:
+    """
+    Load the accounts of several pages with one query, keyed by user_id.
+    """
+    statement = select(InstagramUser).where(InstagramUser.user_id.in_(set(user_ids)))
+    result = await db.execute(statement)
+    return {user.user_id: user for user in result.scalars()}
+
+async def get_all_instagram_accounts(db: AsyncSession):
+    result = await db.execute(select(InstagramUser))
+    return result.scalars().all()
+
 async def update_instagram_bot_id(db: AsyncSession, user_id, new_bot_id):
     user = await get_instagram_account_user_by_id(db, user_id)
     if user is None:
@@ -32,4 +46,5 @@ async def update_instagram_bot_id(db: AsyncSession, user_id, new_bot_id):
     user.bot_id = new_bot_id
     await db.commit()
     await db.refresh(user)
+    await publish_account_changed("instagram", user_id)
     return user
@@ -2,6 +2,17 @@ import sqlalchemy as sa
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.db.models.telegram_models import TelegramApp
+from src.utils.config_cache import VersionedConfig
+
+telegram_app_config = VersionedConfig("telegram_app")
+
+
+class TelegramAppDetails:
+    """Detached copy of the TelegramApp row, safe to share across sessions."""
+    def __init__(self, app):
+        self.id = app.id
+        self.api_id = app.api_id
+        self.api_hash = app.api_hash
 
 async def set_telegram_app(api_id: str, api_hash: str, db: AsyncSession) -> TelegramApp:
     """
@@ -15,14 +26,19 @@ async def set_telegram_app(api_id: str, api_hash: str, db: AsyncSession) -> Tele
         app.api_id = api_id
         app.api_hash = api_hash
     await db.commit()
+    await telegram_app_config.invalidate()
     return app
 
 
-async def get_current_app(db: AsyncSession) -> TelegramApp:
+async def get_current_app(db: AsyncSession) -> TelegramAppDetails:
     """
-    Retrieve the current TelegramApp (assuming only one).
+    Retrieve the current TelegramApp (assuming only one), from the config cache.
     """
-    app = await db.get(TelegramApp, 1)
+    async def load():
+        app = await db.get(TelegramApp, 1)
+        return TelegramAppDetails(app) if app is not None else None
+
+    app = await telegram_app_config.get(load)
     if app is None:
         raise ValueError("Telegram app is not set. Use /set-app to configure.")
     return app
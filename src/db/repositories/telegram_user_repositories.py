@@ -1,6 +1,7 @@
 import sqlalchemy as sa
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import update, select
+from src.core.account_events import publish_account_changed
 from src.db.models.telegram_models import TelegramUser
 
 async def add_or_update_telegram_user(phone_number: str, db: AsyncSession, **kwargs) -> TelegramUser:
@@ -22,6 +23,8 @@ async def add_or_update_telegram_user(phone_number: str, db: AsyncSession, **kwa
         setattr(user, key, value)
 
     await db.commit()
+    if user.user_id:
+        await publish_account_changed("telegram", user.user_id)
     return user
 
 async def get_telegram_user_by_id(db: AsyncSession, user_id: str ):
@@ -32,6 +35,21 @@ async def get_telegram_user_by_id(db: AsyncSession, user_id: str ):
     result = await db.execute(query)
     return result.scalar()
 
+async def get_telegram_users_by_ids(db: AsyncSession, user_ids) -> dict:
+    """
+    Fetch several Telegram users with one query, keyed by user_id.
+    """
+    query = select(TelegramUser).where(TelegramUser.user_id.in_({str(user_id) for user_id in user_ids}))
+    result = await db.execute(query)
+    return {user.user_id: user for user in result.scalars()}
+
+async def get_logged_in_telegram_users(db: AsyncSession):
+    """
+    Fetch every Telegram user that completed login (has a user_id).
+    """
+    result = await db.execute(select(TelegramUser).where(TelegramUser.user_id.is_not(None)))
+    return result.scalars().all()
+
 async def get_user_by_phone(phone_number: str, db: AsyncSession) -> TelegramUser:
     result = await db.execute(
         sa.select(TelegramUser).where(TelegramUser.phone_number == phone_number)
@@ -51,4 +69,5 @@ async def update_telegram_bot_id(db: AsyncSession, user_id: str, bot_id: str):
     )
     await db.execute(query)
     await db.commit()
+    await publish_account_changed("telegram", user_id)
     return True
\ No newline at end of file
@@ -1,30 +1,101 @@
 # src/db/repositories/thread_repository.py
+import logging
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
+from sqlalchemy.dialects.postgresql import insert
 from src.db.models.openai_models import Thread
-import uuid
+from src.core.config import THREAD_CACHE_SIZE, THREAD_CACHE_TTL, THREAD_CACHE_REDIS_TTL
+from src.core.redis_setup import get_async_redis
+from src.utils.cache import TTLCache
+from src.utils.metrics import register_metrics
+
+
+logger = logging.getLogger(__name__)
+
+# (platform, owner_id, sender_id) -> thread_id. A conversation's thread never changes once saved, even
+# when the account's bot is reassigned (runs use the current assistant), so both tiers can be
+# read-through/write-through without coordination.
+thread_cache = TTLCache(maxsize=THREAD_CACHE_SIZE, ttl=THREAD_CACHE_TTL)
+redis_stats = {"hits": 0, "misses": 0, "errors": 0}
+
+register_metrics("thread_cache", lambda: {"local": thread_cache.stats(), "redis": dict(redis_stats)})
+
+
+def _redis_key(sender_id: str, owner_id: str, platform: str) -> str:
+    return f"thread:{platform}:{owner_id}:{sender_id}"
+
+
+async def _get_cached_thread_id(sender_id: str, owner_id: str, platform: str):
+    thread_id = thread_cache.get((platform, owner_id, sender_id))
+    if thread_id is not None:
+        return thread_id
+
+    try:
+        thread_id = await get_async_redis().get(_redis_key(sender_id, owner_id, platform))
+    except Exception as e:
+        redis_stats["errors"] += 1
+        logger.warning(f"Thread cache lookup in Redis failed: {e}")
+        return None
+
+    if thread_id is None:
+        redis_stats["misses"] += 1
+        return None
+    redis_stats["hits"] += 1
+    thread_cache.set((platform, owner_id, sender_id), thread_id)
+    return thread_id
+
+
+async def _cache_thread_id(sender_id: str, owner_id: str, platform: str, thread_id: str):
+    thread_cache.set((platform, owner_id, sender_id), thread_id)
+    try:
+        await get_async_redis().set(_redis_key(sender_id, owner_id, platform), thread_id, ex=THREAD_CACHE_REDIS_TTL)
+    except Exception as e:
+        redis_stats["errors"] += 1
+        logger.warning(f"Thread cache write to Redis failed: {e}")
 
 
 async def get_thread(db: AsyncSession, sender_id: str, owner_id: str, platform: str):
     """
-    Fetch an existing thread by sender_id and owner_id.
+    Fetch the thread_id of an existing conversation by sender_id, owner_id and platform.
+    Reads through the in-process and Redis caches before querying the database.
     """
-    statement = select(Thread).where(Thread.sender_id == sender_id, Thread.owner_id == owner_id, Thread.platform == platform)
+    thread_id = await _get_cached_thread_id(sender_id, owner_id, platform)
+    if thread_id is not None:
+        return thread_id
+
+    statement = select(Thread.thread_id).where(Thread.sender_id == sender_id, Thread.owner_id == owner_id, Thread.platform == platform)
     result = await db.execute(statement)
-    return result.scalars().first()
+    thread_id = result.scalars().first()
+    if thread_id is not None:
+        await _cache_thread_id(sender_id, owner_id, platform, thread_id)
+    return thread_id
 
 
-async def save_thread(db: AsyncSession, sender_id: str, owner_id: str, assistant_id: str, thread_id: str, platform: str):
+async def save_thread(db: AsyncSession, sender_id: str, owner_id: str, assistant_id: str, thread_id: str, platform: str) -> str:
     """
-    Save a new thread to the database.
+    Save a new thread to the database, unless the conversation already has one.
+    Returns the thread_id stored for the conversation, which is the existing one
+    if a concurrent message saved its thread first.
     """
-    new_thread = Thread(
-        thread_id=thread_id,
-        sender_id=sender_id,
-        owner_id=owner_id,
-        assistant_id=assistant_id,
-        platform=platform
+    statement = (
+        insert(Thread)
+        .values(
+            thread_id=thread_id,
+            sender_id=sender_id,
+            owner_id=owner_id,
+            assistant_id=assistant_id,
+            platform=platform,
+        )
+        .on_conflict_do_update(
+            index_elements=[Thread.sender_id, Thread.owner_id, Thread.platform],
+            # No-op update, so RETURNING yields the row that won
+            set_={"thread_id": Thread.thread_id},
+        )
+        .returning(Thread.thread_id)
     )
-    db.add(new_thread)
+    result = await db.execute(statement)
     await db.commit()
-    return new_thread
+    saved_thread_id = result.scalar_one()
+    await _cache_thread_id(sender_id, owner_id, platform, saved_thread_id)
+    return saved_thread_id
+
@@ -0,0 +1,39 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from src.db.models.whatsapp_models import WhatsAppDeadLetter
+
+
+async def add_whatsapp_dead_letter(
+    db: AsyncSession,
+    id_instance: str,
+    chat_id: str,
+    message: str,
+    attempts: int,
+    status_code: int = None,
+    error: str = None,
+):
+    dead_letter = WhatsAppDeadLetter(
+        id_instance=int(id_instance),
+        chat_id=chat_id,
+        message=message,
+        attempts=attempts,
+        status_code=status_code,
+        error=error,
+    )
+    db.add(dead_letter)
+    await db.commit()
+    return dead_letter
+
+
+async def get_whatsapp_dead_letters(db: AsyncSession, id_instance: str, limit: int = 100):
+    """
+    Latest dead-lettered messages of an instance, newest first.
+    """
+    result = await db.execute(
+        select(WhatsAppDeadLetter)
+        .where(WhatsAppDeadLetter.id_instance == int(id_instance))
+        .order_by(WhatsAppDeadLetter.id.desc())
+        .limit(limit)
+    )
+    return result.scalars().all()
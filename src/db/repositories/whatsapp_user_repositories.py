@@ -1,6 +1,7 @@
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy import select, update
+from src.core.account_events import publish_account_changed, publish_account_changed_sync
 from src.db.models.whatsapp_models import WhatsAppUser
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -58,6 +59,7 @@ def create_or_update_whatsapp_user(
             # Commit changes (either update or insert)
         db.commit()
         db.refresh(user)
+        publish_account_changed_sync("whatsapp", id_instance)
 
         return user
 
@@ -98,6 +100,19 @@ async def get_whatsapp_user_by_id(db: AsyncSession, id_instance: str):
         print(f"Error retrieving WhatsApp user: {e}")
         return None
 
+async def get_whatsapp_users_by_ids(db: AsyncSession, id_instances) -> dict:
+    """
+    Load the users of several instances with one query, keyed by id_instance as a string.
+    """
+    result = await db.execute(
+        select(WhatsAppUser).where(WhatsAppUser.id_instance.in_({int(id_instance) for id_instance in id_instances}))
+    )
+    return {str(user.id_instance): user for user in result.scalars()}
+
+async def get_all_whatsapp_users(db: AsyncSession):
+    result = await db.execute(select(WhatsAppUser))
+    return result.scalars().all()
+
 async def update_whatsapp_user_bot_id(
     db: AsyncSession,
     user_id: str,
@@ -111,6 +126,7 @@ async def update_whatsapp_user_bot_id(
     )
     await db.execute(query)
     await db.commit()
+    await publish_account_changed("whatsapp", user_id)
     return True
 
 
@@ -1,3 +1,4 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 import logging
 
@@ -6,9 +7,21 @@ from src.messengers.whatsapp_api.routes import whatsapp_api_router
 from src.messengers.telegram_api.routes import telegram_api_router
 
 from src.bots.openai.routes import bot_router
+from src.bots.openai.message_coalescer import message_coalescer
+from src.bots.openai.run_supervisor import run_supervisor
+from src.messengers.background import reply_worker_pool
+from src.messengers.inbound_consumer import inbound_consumer
+from src.messengers.account_registry import account_registry
+from src.messengers.pipeline import platforms
+from src.messengers.whatsapp_api.service import whatsapp_send_queue
+from src.messengers.instagram_api.graph_usage import instagram_send_queue
+from src.core.config import INBOUND_CONSUMER_ENABLED
+from src.core.http_clients import http_clients, GRAPH_INSTAGRAM
+from src.utils.config_cache import config_change_listener
 
 from src.utils.middleware import register_middleware
 from src.utils.errors_handler import register_all_errors
+from src.utils.metrics import register_metrics_endpoint
 
 from src.utils.logs_handler import setup_logging
 
@@ -25,6 +38,26 @@ Instagram Graph API, Telethon, GreenAPI, OpenAI
 version_prefix = f"/{version}"
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    http_clients.open(GRAPH_INSTAGRAM)
+    await reply_worker_pool.start()
+    await config_change_listener.start()
+    await account_registry.start(platforms.values())
+    # Per-account streams of the Telegram clients held here are read even when partitions run standalone
+    await inbound_consumer.start(shared=INBOUND_CONSUMER_ENABLED)
+    yield
+    await inbound_consumer.stop()
+    await account_registry.stop()
+    await config_change_listener.stop()
+    await reply_worker_pool.stop()
+    await message_coalescer.stop()
+    await run_supervisor.drain()
+    await whatsapp_send_queue.stop()
+    await instagram_send_queue.stop()
+    await http_clients.aclose()
+
+
 def create_application() -> FastAPI:
     app = FastAPI(
         title="Integrations",
@@ -37,10 +70,12 @@ def create_application() -> FastAPI:
             "email": "islambek040508@gmail.com",
         },
         docs_url=f"{version_prefix}/docs",
+        lifespan=lifespan,
     )
     setup_logging()
     register_middleware(app)
     register_all_errors(app)
+    register_metrics_endpoint(app, f"{version_prefix}/metrics")
     app.include_router(instagram_api_router, prefix=f"{version_prefix}/instagram", tags=["InstagramAPI"])
     app.include_router(telegram_api_router, prefix=f"{version_prefix}/telegram", tags=["TelegramAPI"])
     app.include_router(whatsapp_api_router, prefix=f"{version_prefix}/whatsapp", tags=["WhatsappAPI"])
@@ -0,0 +1,199 @@
+import asyncio
+import json
+import logging
+from typing import Optional
+
+from pydantic import BaseModel
+
+from src.core.account_events import ACCOUNT_CHANGES_CHANNEL, local_change_handlers
+from src.core.config import (
+    ACCOUNT_REGISTRY_SIZE,
+    ACCOUNT_REGISTRY_TTL,
+    ACCOUNT_REGISTRY_MISS_TTL,
+    ACCOUNT_REGISTRY_DEGRADED_TTL,
+)
+from src.core.database_setup import AsyncSessionLocal
+from src.core.redis_setup import get_async_redis
+from src.utils.cache import TTLCache, MISSING
+from src.utils.metrics import register_metrics
+
+
+logger = logging.getLogger(__name__)
+
+
+class AccountRoute(BaseModel):
+    """
+    What the pipeline needs to answer on behalf of a connected account.
+    """
+    platform: str
+    account_id: str
+    bot_id: Optional[str] = None
+    access_token: Optional[str] = None  # Instagram page token
+    api_url: Optional[str] = None  # Green API host and token
+    api_token: Optional[str] = None
+
+
+class AccountBatcher:
+    """
+    Merges the account lookups issued in the same event loop iteration, e.g. by the
+    conversations of one consumer batch, into one resolve_accounts query per platform.
+    """
+
+    def __init__(self) -> None:
+        self._pending: dict[str, dict[str, asyncio.Future]] = {}
+        # Running flushes; the loop only keeps weak references to tasks
+        self._flushes: set[asyncio.Task] = set()
+        self.stats = {"lookups": 0, "queries": 0}
+
+    async def load(self, adapter, account_id: str):
+        self.stats["lookups"] += 1
+        pending = self._pending.get(adapter.platform)
+        if pending is None:
+            pending = self._pending[adapter.platform] = {}
+            asyncio.get_running_loop().call_soon(self._start_flush, adapter)
+        future = pending.get(account_id)
+        if future is None:
+            future = pending[account_id] = asyncio.get_running_loop().create_future()
+        return await asyncio.shield(future)
+
+    async def stop(self):
+        for task in list(self._flushes):
+            task.cancel()
+        await asyncio.gather(*self._flushes, return_exceptions=True)
+
+    def _start_flush(self, adapter):
+        task = asyncio.create_task(self._flush(adapter))
+        self._flushes.add(task)
+        task.add_done_callback(self._flushes.discard)
+
+    async def _flush(self, adapter):
+        pending = self._pending.pop(adapter.platform)
+        self.stats["queries"] += 1
+        try:
+            async with AsyncSessionLocal() as db:
+                accounts = await adapter.resolve_accounts(db, list(pending))
+            for account_id, future in pending.items():
+                future.set_result(accounts.get(account_id))
+        except Exception as e:
+            for future in pending.values():
+                if not future.done():
+                    future.set_exception(e)
+        finally:
+            # Cancelled mid-query, e.g. at shutdown; the waiting loads must not hang
+            for future in pending.values():
+                if not future.done():
+                    future.cancel()
+
+
+class AccountRegistry:
+    """
+    In-process map of (platform, account id) -> AccountRoute, so routing a message needs no
+    DB round-trip. Warmed at startup; entries are dropped when any process publishes an
+    account change, and misses are loaded through the AccountBatcher. While the change
+    subscription is down, entries only live ACCOUNT_REGISTRY_DEGRADED_TTL seconds.
+    """
+
+    def __init__(self) -> None:
+        self._routes = TTLCache(maxsize=ACCOUNT_REGISTRY_SIZE, ttl=ACCOUNT_REGISTRY_TTL)
+        self._batcher = AccountBatcher()
+        self._listener: asyncio.Task = None
+        self._subscribed = asyncio.Event()
+        # Bumped on every invalidation, so a lookup that raced one is not cached
+        self._generation = 0
+        # Until subscribed, changes published by other processes are not seen
+        self._degraded = True
+        self.stats = {"warmed": 0, "invalidations": 0, "resyncs": 0}
+
+    def snapshot(self) -> dict:
+        return {
+            **self.stats,
+            "degraded": self._degraded,
+            "routes": self._routes.stats(),
+            "db_lookups": dict(self._batcher.stats),
+        }
+
+    def _ttl(self, route: Optional[AccountRoute]) -> Optional[float]:
+        if self._degraded:
+            return min(ACCOUNT_REGISTRY_DEGRADED_TTL, ACCOUNT_REGISTRY_MISS_TTL) if route is None else ACCOUNT_REGISTRY_DEGRADED_TTL
+        # Unknown accounts are remembered briefly so unrouted traffic doesn't reach the DB each time
+        return ACCOUNT_REGISTRY_MISS_TTL if route is None else None
+
+    async def get(self, adapter, account_id: str) -> Optional[AccountRoute]:
+        key = (adapter.platform, account_id)
+        route = self._routes.get(key, MISSING)
+        if route is not MISSING:
+            return route
+        generation = self._generation
+        route = await self._batcher.load(adapter, account_id)
+        if generation == self._generation:
+            self._routes.set(key, route, ttl=self._ttl(route))
+        return route
+
+    def invalidate(self, platform: str, account_id: str):
+        self.stats["invalidations"] += 1
+        self._generation += 1
+        self._routes.invalidate((platform, account_id))
+
+    async def warm(self, adapters):
+        for adapter in adapters:
+            try:
+                async with AsyncSessionLocal() as db:
+                    routes = await adapter.list_accounts(db)
+            except Exception as e:
+                logger.warning(f"Warming the {adapter.platform} account registry failed: {e}")
+                continue
+            for account_id, route in routes.items():
+                self._routes.set((adapter.platform, account_id), route, ttl=self._ttl(route))
+            self.stats["warmed"] += len(routes)
+        logger.info(f"Account registry warmed with {self.stats['warmed']} accounts")
+
+    async def start(self, adapters):
+        """
+        Subscribe to account changes first, so nothing changed during warm-up is missed.
+        """
+        self._listener = asyncio.create_task(self._listen(), name="account-registry-listener")
+        try:
+            await asyncio.wait_for(self._subscribed.wait(), 5)
+        except TimeoutError:
+            logger.warning("Account change subscription is not up yet, warming the registry anyway")
+        await self.warm(adapters)
+
+    async def stop(self):
+        if self._listener is not None:
+            self._listener.cancel()
+            await asyncio.gather(self._listener, return_exceptions=True)
+        await self._batcher.stop()
+
+    async def _listen(self):
+        while True:
+            pubsub = get_async_redis().pubsub()
+            try:
+                await pubsub.subscribe(ACCOUNT_CHANGES_CHANNEL)
+                async for message in pubsub.listen():
+                    if message["type"] == "subscribe":
+                        # Changes published while we were not subscribed are lost, start over
+                        self.stats["resyncs"] += 1
+                        self._generation += 1
+                        self._routes.clear()
+                        self._degraded = False
+                        self._subscribed.set()
+                    elif message["type"] == "message":
+                        change = json.loads(message["data"])
+                        self.invalidate(change["platform"], change["account_id"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Account change subscription failed, caching accounts briefly until it is back: {e}")
+                if not self._degraded:
+                    self._degraded = True
+                    self._generation += 1
+                    self._routes.clear()
+                await asyncio.sleep(1)
+            finally:
+                await pubsub.aclose()
+
+
+account_registry = AccountRegistry()
+local_change_handlers.append(account_registry.invalidate)
+
+register_metrics("account_registry", account_registry.snapshot)
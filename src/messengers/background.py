@@ -0,0 +1,88 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable
+
+from src.core.config import REPLY_WORKERS, REPLY_QUEUE_SIZE
+from src.utils.metrics import register_metrics, LatencyRecorder, StageTimer
+
+
+logger = logging.getLogger(__name__)
+
+reply_latency = LatencyRecorder()
+
+
+class ReplyWorkerPool:
+    """
+    Fixed pool of background workers that generate and send replies, so webhook
+    handlers can acknowledge as soon as the event is queued.
+    """
+
+    def __init__(self, workers: int = REPLY_WORKERS, max_queue: int = REPLY_QUEUE_SIZE) -> None:
+        self.workers = workers
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self._tasks: list[asyncio.Task] = []
+        self.busy = 0
+        self.stats = {"submitted": 0, "rejected": 0, "completed": 0, "failed": 0}
+
+    def snapshot(self) -> dict:
+        return {
+            **self.stats,
+            "queued": self._queue.qsize(),
+            "busy": self.busy,
+            "workers": len(self._tasks),
+            "latency": reply_latency.snapshot(),
+        }
+
+    async def start(self):
+        for i in range(self.workers):
+            self._tasks.append(asyncio.create_task(self._work(), name=f"reply-worker-{i}"))
+        logger.info(f"Started {self.workers} reply workers")
+
+    async def stop(self, timeout: float = 10):
+        """
+        Give queued jobs up to timeout seconds to finish, then cancel the workers.
+        """
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except TimeoutError:
+            logger.warning(f"Stopping reply workers with {self._queue.qsize()} jobs still queued")
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+
+    def submit(self, name: str, job: Callable[[StageTimer], Awaitable[None]], received_at: float = None) -> bool:
+        """
+        Queue job without waiting. The job receives a StageTimer started when the event was received;
+        returns False when the queue is full.
+        """
+        timer = StageTimer(reply_latency, name, received_at)
+        try:
+            self._queue.put_nowait((name, job, timer))
+        except asyncio.QueueFull:
+            self.stats["rejected"] += 1
+            logger.error(f"Reply queue is full, rejecting {name} job")
+            return False
+        self.stats["submitted"] += 1
+        return True
+
+    async def _work(self):
+        while True:
+            name, job, timer = await self._queue.get()
+            self.busy += 1
+            try:
+                timer.mark("queued")
+                await job(timer)
+                self.stats["completed"] += 1
+            except Exception as e:
+                self.stats["failed"] += 1
+                logger.error(f"Background {name} job failed: {e}")
+            finally:
+                timer.finish()
+                self.busy -= 1
+                self._queue.task_done()
+
+
+reply_worker_pool = ReplyWorkerPool()
+
+register_metrics("reply_workers", reply_worker_pool.snapshot)
@@ -0,0 +1,66 @@
+import logging
+
+from src.core.config import INBOUND_DEDUP_TTL, INBOUND_DEDUP_CACHE_SIZE
+from src.core.redis_setup import get_async_redis
+from src.utils.cache import TTLCache
+from src.utils.metrics import register_metrics
+
+
+logger = logging.getLogger(__name__)
+
+# (platform, message_id) of recently claimed messages; Redis is the source of truth across processes
+seen_messages = TTLCache(maxsize=INBOUND_DEDUP_CACHE_SIZE, ttl=INBOUND_DEDUP_TTL)
+dedup_stats = {"accepted": 0, "duplicates_local": 0, "duplicates_redis": 0, "missing_id": 0, "redis_errors": 0}
+
+register_metrics("inbound_dedup", lambda: dict(dedup_stats))
+
+
+def _redis_key(platform: str, message_id: str) -> str:
+    return f"inbound:{platform}:{message_id}"
+
+
+async def claim_message(platform: str, message_id) -> bool:
+    """
+    Claim an inbound message for processing. Returns False if the same platform message id
+    was already claimed, so retried webhooks and repeated events are dropped before any work.
+    Fails open when the message has no id or Redis is unreachable.
+    """
+    if not message_id:
+        dedup_stats["missing_id"] += 1
+        return True
+
+    message_id = str(message_id)
+    if seen_messages.get((platform, message_id)) is not None:
+        dedup_stats["duplicates_local"] += 1
+        logger.info(f"Dropping duplicate {platform} message {message_id}")
+        return False
+    seen_messages.set((platform, message_id), True)
+
+    try:
+        claimed = await get_async_redis().set(_redis_key(platform, message_id), 1, nx=True, ex=INBOUND_DEDUP_TTL)
+    except Exception as e:
+        dedup_stats["redis_errors"] += 1
+        logger.warning(f"Dedup claim in Redis failed for {platform} message {message_id}: {e}")
+        return True
+
+    if not claimed:
+        dedup_stats["duplicates_redis"] += 1
+        logger.info(f"Dropping duplicate {platform} message {message_id}")
+        return False
+    dedup_stats["accepted"] += 1
+    return True
+
+
+async def release_message(platform: str, message_id):
+    """
+    Give up a claim, e.g. when the message could not be queued and the platform should redeliver it.
+    """
+    if not message_id:
+        return
+    message_id = str(message_id)
+    seen_messages.invalidate((platform, message_id))
+    try:
+        await get_async_redis().delete(_redis_key(platform, message_id))
+    except Exception as e:
+        dedup_stats["redis_errors"] += 1
+        logger.warning(f"Dedup release in Redis failed for {platform} message {message_id}: {e}")
@@ -0,0 +1,104 @@
+import asyncio
+import json
+import logging
+import time
+import zlib
+from functools import partial
+from typing import Awaitable, Callable
+
+from src.core.config import INBOUND_STREAM_PARTITIONS, INBOUND_STREAM_MAXLEN
+from src.core.redis_setup import get_async_redis
+from src.messengers.background import reply_worker_pool, reply_latency
+from src.utils.metrics import register_metrics, StageTimer
+
+
+logger = logging.getLogger(__name__)
+
+STREAM_PREFIX = "inbound_stream"
+DEAD_LETTER_STREAM = f"{STREAM_PREFIX}:dead"
+
+# platform -> job that generates and sends the reply for one event payload
+reply_handlers: dict[str, Callable[..., Awaitable[None]]] = {}
+# Per-account streams this process reads, for accounts whose events only it can deliver
+local_streams: set[str] = set()
+local_streams_changed = asyncio.Event()
+publish_stats = {"published": 0, "fallback": 0, "failed": 0}
+
+register_metrics("inbound_stream", lambda: dict(publish_stats))
+
+
+def register_reply_handler(platform: str, handler: Callable[..., Awaitable[None]]):
+    """
+    Register the reply job for a platform. It is called as handler(timer, **payload), or by the
+    stream consumer as handler(timer, coalesce=False, **payload), as it merges queued messages itself.
+    """
+    reply_handlers[platform] = handler
+
+
+def stream_key(partition: int) -> str:
+    return f"{STREAM_PREFIX}:{partition}"
+
+
+def account_stream(platform: str, account_id: str) -> str:
+    """
+    Stream of one account, for platforms whose replies need state held by a single process.
+    """
+    return f"{STREAM_PREFIX}:{platform}:{account_id}"
+
+
+def read_locally(stream: str):
+    """
+    Have this process's consumer read stream, e.g. once it holds the account's client.
+    """
+    if stream not in local_streams:
+        local_streams.add(stream)
+        local_streams_changed.set()
+
+
+def stop_reading_locally(stream: str):
+    """
+    Stop reading stream; its unacknowledged entries wait for the next process that reads it.
+    """
+    local_streams.discard(stream)
+    local_streams_changed.set()
+
+
+def partition_for(partition_key: str) -> int:
+    """
+    Stable partition of a conversation, so all of its events are consumed by one consumer in order.
+    """
+    return zlib.crc32(partition_key.encode()) % INBOUND_STREAM_PARTITIONS
+
+
+def timer_for(platform: str, received_at: float) -> StageTimer:
+    """
+    StageTimer for an event received at the given epoch time, possibly in another process.
+    """
+    return StageTimer(reply_latency, platform, time.perf_counter() - max(time.time() - received_at, 0))
+
+
+async def publish_event(platform: str, partition_key: str, payload: dict, stream: str = None) -> bool:
+    """
+    Append a normalized inbound event to stream, by default its partition stream. If Redis is
+    unavailable the event is handed to the in-process reply workers instead. Returns False if
+    neither accepted it.
+    """
+    received_at = time.time()
+    fields = {
+        "platform": platform,
+        "partition_key": partition_key,
+        "payload": json.dumps(payload),
+        "received_at": str(received_at),
+    }
+    try:
+        await get_async_redis().xadd(
+            stream or stream_key(partition_for(partition_key)), fields, maxlen=INBOUND_STREAM_MAXLEN, approximate=True
+        )
+        publish_stats["published"] += 1
+        return True
+    except Exception as e:
+        logger.warning(f"Publishing {platform} event to the inbound stream failed, processing it in-process: {e}")
+
+    queued = reply_worker_pool.submit(platform, partial(reply_handlers[platform], **payload))
+    publish_stats["fallback" if queued else "failed"] += 1
+    return queued
@@ -0,0 +1,459 @@
+import asyncio
+import itertools
+import json
+import logging
+import math
+import os
+import socket
+import time
+import uuid
+from collections import deque
+from functools import partial
+from typing import Callable
+
+from redis.exceptions import ResponseError
+
+from src.core.config import (
+    INBOUND_STREAM_PARTITIONS,
+    INBOUND_STREAM_BATCH,
+    INBOUND_STREAM_BLOCK_MS,
+    INBOUND_STREAM_CLAIM_IDLE_MS,
+    INBOUND_STREAM_MAX_DELIVERIES,
+    INBOUND_STREAM_LEASE_MS,
+    INBOUND_STREAM_BUFFER,
+    INBOUND_STREAM_RETRY_BACKOFF,
+    INBOUND_BATCH_CONCURRENCY,
+    MESSAGE_COALESCE_WINDOW_MS,
+    MESSAGE_COALESCE_MAX_WAIT_MS,
+)
+from src.bots.openai.message_coalescer import message_coalescer
+from src.bots.openai.run_supervisor import run_supervisor
+from src.core.http_clients import http_clients
+from src.core.redis_setup import get_async_redis
+from src.messengers.event_stream import (
+    STREAM_PREFIX,
+    DEAD_LETTER_STREAM,
+    reply_handlers,
+    stream_key,
+    timer_for,
+    local_streams,
+    local_streams_changed,
+)
+# Imported for their register_reply_handler side effect, so a standalone consumer can process every platform
+from src.messengers.instagram_api import service as instagram_service  # noqa: F401
+from src.messengers.whatsapp_api import service as whatsapp_service  # noqa: F401
+from src.messengers.telegram_api import service as telegram_service  # noqa: F401
+from src.messengers.account_registry import account_registry
+from src.messengers.pipeline import platforms, merge_payloads
+from src.utils.config_cache import config_change_listener
+from src.utils.metrics import register_metrics
+from src.utils.logs_handler import setup_logging
+
+
+logger = logging.getLogger(__name__)
+
+GROUP = "reply-workers"
+# Consumers sharing the partitions, for the fair share
+CONSUMERS_KEY = f"{STREAM_PREFIX}:consumers"
+# Every running consumer, so the entries of dead ones can be reclaimed at once
+LIVE_KEY = f"{STREAM_PREFIX}:live"
+
+# Only the lease holder may renew or release it
+_RENEW_LEASE = """
+if redis.call('get', KEYS[1]) == ARGV[1] then return redis.call('pexpire', KEYS[1], ARGV[2]) end
+return 0
+"""
+_RELEASE_LEASE = """
+if redis.call('get', KEYS[1]) == ARGV[1] then return redis.call('del', KEYS[1]) end
+return 0
+"""
+
+
+def lease_key(partition: int) -> str:
+    return f"{STREAM_PREFIX}:lease:{partition}"
+
+
+class _Reader:
+    """
+    In-flight state of a leased partition, or of the per-account streams read locally: each
+    conversation with unacknowledged entries has a lane, drained in order by its own task, so a
+    slow conversation only holds back itself.
+    """
+
+    def __init__(self, name: str, streams: Callable[[], list[str]], changed: asyncio.Event = None) -> None:
+        self.name = name
+        self.streams = streams
+        # Set when streams() may return something new
+        self.changed = changed
+        self.stop = asyncio.Event()
+        self.lanes: dict[str, deque] = {}
+        self.workers: set[asyncio.Task] = set()
+        # (stream, entry id) of the entries read and not yet acknowledged
+        self.buffered: set[tuple[str, str]] = set()
+        # Streams whose consumer group is known to exist
+        self.groups: set[str] = set()
+        self.room = asyncio.Event()
+        self.slots = asyncio.Semaphore(INBOUND_BATCH_CONCURRENCY)
+
+
+class InboundStreamConsumer:
+    """
+    Processes the inbound partition streams through a consumer group.
+
+    Each partition is leased to one consumer at a time, and partitions are spread evenly
+    over the live consumers of every process. A partition keeps reading while its
+    conversations are in flight: conversations run concurrently up to
+    INBOUND_BATCH_CONCURRENCY, each conversation's entries strictly in order. A failed
+    entry is retried in place before anything newer of its conversation, and moved to
+    the dead-letter stream after INBOUND_STREAM_MAX_DELIVERIES attempts. Entries left
+    pending by a dead consumer are reclaimed. With MESSAGE_COALESCE_WINDOW_MS set, a
+    conversation's queued entries are merged into one reply (pipeline.merge_payloads).
+
+    The per-account streams of platforms whose replies need a client only this process
+    holds (event_stream.read_locally) are read the same way, by this process alone.
+    """
+
+    def __init__(self, name: str = None) -> None:
+        self.name = name or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        # partition -> (consumer task, reader); a set reader.stop means the partition is being handed back
+        self._partitions: dict[int, tuple[asyncio.Task, _Reader]] = {}
+        self._local: tuple[asyncio.Task, _Reader] = None
+        self._shared = False
+        self._coordinator: asyncio.Task = None
+        self.stats = {
+            "processed": 0,
+            "failed": 0,
+            "retried": 0,
+            "merged": 0,
+            "reclaimed": 0,
+            "dead_lettered": 0,
+            "leases_acquired": 0,
+            "leases_lost": 0,
+        }
+
+    def snapshot(self) -> dict:
+        return {
+            **self.stats,
+            "consumer": self.name,
+            "partitions": {
+                partition: {"conversations": len(reader.lanes), "buffered": len(reader.buffered)}
+                for partition, (_, reader) in sorted(self._partitions.items())
+            },
+            "local_streams": len(local_streams),
+        }
+
+    async def start(self, shared: bool = True):
+        """
+        Start reading the streams of the accounts held by this process and, if shared, take a
+        fair share of the partitions.
+        """
+        self._shared = shared
+        reader = _Reader("local streams", lambda: sorted(local_streams), local_streams_changed)
+        self._local = (asyncio.create_task(self._consume(reader), name="inbound-stream-local"), reader)
+        self._coordinator = asyncio.create_task(self._coordinate(), name="inbound-stream-coordinator")
+        logger.info(f"Inbound stream consumer {self.name} started (partitions: {shared})")
+
+    async def stop(self):
+        """
+        Stop reading, let in-flight entries finish and release every lease.
+        """
+        if self._coordinator is not None:
+            self._coordinator.cancel()
+            await asyncio.gather(self._coordinator, return_exceptions=True)
+        redis = get_async_redis()
+        for partition, (task, reader) in list(self._partitions.items()):
+            reader.stop.set()
+            await asyncio.gather(task, return_exceptions=True)
+            await redis.eval(_RELEASE_LEASE, 1, lease_key(partition), self.name)
+        self._partitions.clear()
+        if self._local is not None:
+            task, reader = self._local
+            reader.stop.set()
+            local_streams_changed.set()
+            await asyncio.gather(task, return_exceptions=True)
+            self._local = None
+        await redis.zrem(CONSUMERS_KEY, self.name)
+        await redis.zrem(LIVE_KEY, self.name)
+
+    async def _coordinate(self):
+        while True:
+            try:
+                await self._heartbeat()
+                if self._shared:
+                    await self._rebalance()
+            except Exception as e:
+                logger.warning(f"Inbound stream rebalance failed: {e}")
+            await asyncio.sleep(INBOUND_STREAM_LEASE_MS / 3000)
+
+    async def _heartbeat(self):
+        redis = get_async_redis()
+        now_ms = int(time.time() * 1000)
+        await redis.zadd(LIVE_KEY, {self.name: now_ms})
+        await redis.zremrangebyscore(LIVE_KEY, 0, now_ms - INBOUND_STREAM_LEASE_MS)
+
+    async def _rebalance(self):
+        redis = get_async_redis()
+        now_ms = int(time.time() * 1000)
+        await redis.zadd(CONSUMERS_KEY, {self.name: now_ms})
+        await redis.zremrangebyscore(CONSUMERS_KEY, 0, now_ms - INBOUND_STREAM_LEASE_MS)
+        fair_share = math.ceil(INBOUND_STREAM_PARTITIONS / max(await redis.zcard(CONSUMERS_KEY), 1))
+
+        for partition, (task, reader) in list(self._partitions.items()):
+            if task.done():
+                await redis.eval(_RELEASE_LEASE, 1, lease_key(partition), self.name)
+                del self._partitions[partition]
+            elif not await redis.eval(_RENEW_LEASE, 1, lease_key(partition), self.name, INBOUND_STREAM_LEASE_MS):
+                # Someone else may own it by now; stop without acknowledging anything further
+                logger.warning(f"Lost the lease on inbound partition {partition}")
+                self.stats["leases_lost"] += 1
+                task.cancel()
+                del self._partitions[partition]
+
+        active = sorted(partition for partition, (_, reader) in self._partitions.items() if not reader.stop.is_set())
+        for partition in active[fair_share:]:
+            # Hand back partitions above our share once their in-flight conversations are done
+            self._partitions[partition][1].stop.set()
+
+        for partition in range(INBOUND_STREAM_PARTITIONS):
+            if len(self._partitions) >= fair_share:
+                break
+            if partition in self._partitions:
+                continue
+            if await redis.set(lease_key(partition), self.name, nx=True, px=INBOUND_STREAM_LEASE_MS):
+                self.stats["leases_acquired"] += 1
+                stream = stream_key(partition)
+                reader = _Reader(stream, lambda stream=stream: [stream])
+                task = asyncio.create_task(self._consume(reader), name=f"inbound-stream-{partition}")
+                self._partitions[partition] = (task, reader)
+
+    async def _consume(self, reader: _Reader):
+        redis = get_async_redis()
+        try:
+            reclaim_at = 0.0
+            while not reader.stop.is_set():
+                room = INBOUND_STREAM_BUFFER - len(reader.buffered)
+                if room <= 0:
+                    # Wait for in-flight entries to be acknowledged before reading more
+                    reader.room.clear()
+                    try:
+                        await asyncio.wait_for(reader.room.wait(), INBOUND_STREAM_BLOCK_MS / 1000)
+                    except TimeoutError:
+                        pass
+                    continue
+                try:
+                    if reader.changed is not None:
+                        reader.changed.clear()
+                    streams = reader.streams()
+                    if not streams:
+                        try:
+                            await asyncio.wait_for(reader.changed.wait(), INBOUND_STREAM_BLOCK_MS / 1000)
+                        except TimeoutError:
+                            pass
+                        continue
+                    for stream in streams:
+                        if stream not in reader.groups:
+                            await self._create_group(stream)
+                            reader.groups.add(stream)
+                            reclaim_at = 0.0
+                    if time.monotonic() >= reclaim_at:
+                        # Orphaned entries first, they are older than anything left to read
+                        reclaim_at = time.monotonic() + INBOUND_STREAM_LEASE_MS / 1000
+                        for stream in streams:
+                            for entry in await self._reclaim(reader, stream):
+                                self._dispatch(reader, stream, *entry)
+                    response = await redis.xreadgroup(
+                        GROUP,
+                        self.name,
+                        {stream: ">" for stream in streams},
+                        count=min(INBOUND_STREAM_BATCH, room),
+                        block=INBOUND_STREAM_BLOCK_MS,
+                    )
+                    for stream, entries in response or []:
+                        for entry in entries:
+                            self._dispatch(reader, stream, *entry)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    logger.warning(f"Reading {reader.name} failed: {e}")
+                    await asyncio.sleep(1)
+            # Handing the streams back: finish what was read, so the next reader starts after it
+            await asyncio.gather(*reader.workers, return_exceptions=True)
+        finally:
+            for worker in reader.workers:
+                worker.cancel()
+
+    async def _create_group(self, stream: str):
+        try:
+            await get_async_redis().xgroup_create(stream, GROUP, id="0", mkstream=True)
+        except ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+
+    def _dispatch(self, reader: _Reader, stream: str, entry_id: str, fields: dict):
+        if (stream, entry_id) in reader.buffered:
+            return
+        reader.buffered.add((stream, entry_id))
+        key = fields.get("partition_key")
+        lane = reader.lanes.get(key)
+        if lane is None:
+            lane = reader.lanes[key] = deque()
+            worker = asyncio.create_task(self._drain(reader, key, lane))
+            reader.workers.add(worker)
+            worker.add_done_callback(reader.workers.discard)
+        lane.append((stream, entry_id, fields))
+
+    async def _drain(self, reader: _Reader, key: str, lane: deque):
+        started = time.perf_counter()
+        processed = 0
+        try:
+            async with reader.slots:
+                while lane:
+                    if MESSAGE_COALESCE_WINDOW_MS > 0:
+                        await self._settle(lane)
+                        group = list(itertools.islice(lane, INBOUND_STREAM_BATCH))
+                    else:
+                        group = [lane[0]]
+                    await self._process_entries(group)
+                    for stream, entry_id, _ in group:
+                        lane.popleft()
+                        reader.buffered.discard((stream, entry_id))
+                    reader.room.set()
+                    processed += len(group)
+        finally:
+            del reader.lanes[key]
+        logger.info(
+            f"Processed {processed} entries of conversation {key} from {reader.name} "
+            f"in {(time.perf_counter() - started) * 1000:.1f} ms"
+        )
+
+    async def _settle(self, lane: deque):
+        """
+        Wait until the conversation has been quiet for MESSAGE_COALESCE_WINDOW_MS, at most
+        MESSAGE_COALESCE_MAX_WAIT_MS, so rapid-fire messages are answered by one reply.
+        """
+        deadline = time.monotonic() + max(MESSAGE_COALESCE_MAX_WAIT_MS, MESSAGE_COALESCE_WINDOW_MS) / 1000
+        while True:
+            size = len(lane)
+            delay = min(MESSAGE_COALESCE_WINDOW_MS / 1000, deadline - time.monotonic())
+            if delay <= 0:
+                return
+            await asyncio.sleep(delay)
+            if len(lane) == size:
+                return
+
+    async def _reclaim(self, reader: _Reader, stream: str) -> list:
+        """
+        Take over entries left unacknowledged by consumers that are gone, or that held them too long.
+        """
+        redis = get_async_redis()
+        summary = await redis.xpending(stream, GROUP)
+        if not summary["pending"]:
+            return []
+        live = set(await redis.zrangebyscore(LIVE_KEY, int(time.time() * 1000) - INBOUND_STREAM_LEASE_MS, "+inf"))
+
+        entries = []
+        for consumer in summary["consumers"]:
+            name = consumer["name"]
+            if name == self.name:
+                # Ours but not in flight: left behind when we lost the lease earlier
+                pending = [
+                    item for item in await redis.xpending_range(stream, GROUP, "-", "+", INBOUND_STREAM_BATCH, consumername=name)
+                    if (stream, item["message_id"]) not in reader.buffered
+                ]
+                min_idle_time = 0
+            elif name in live:
+                pending = await redis.xpending_range(
+                    stream, GROUP, "-", "+", INBOUND_STREAM_BATCH, consumername=name, idle=INBOUND_STREAM_CLAIM_IDLE_MS
+                )
+                min_idle_time = INBOUND_STREAM_CLAIM_IDLE_MS
+            else:
+                pending = await redis.xpending_range(stream, GROUP, "-", "+", INBOUND_STREAM_BATCH, consumername=name)
+                min_idle_time = 0
+            if not pending:
+                continue
+
+            deliveries = {item["message_id"]: item["times_delivered"] for item in pending}
+            claimed = await redis.xclaim(stream, GROUP, self.name, min_idle_time, list(deliveries))
+            for entry_id, fields in claimed:
+                if not fields:
+                    # Trimmed from the stream while pending
+                    await redis.xack(stream, GROUP, entry_id)
+                elif deliveries.get(entry_id, 0) > INBOUND_STREAM_MAX_DELIVERIES:
+                    await self._dead_letter(stream, entry_id, fields)
+                else:
+                    entries.append((entry_id, fields))
+        self.stats["reclaimed"] += len(entries)
+        # Stream ids grow over time, so sorting restores the order of each conversation
+        return sorted(entries, key=lambda entry: tuple(int(part) for part in entry[0].split("-")))
+
+    async def _dead_letter(self, stream: str, entry_id: str, fields: dict):
+        redis = get_async_redis()
+        logger.error(f"Moving inbound entry {entry_id} of {stream} to {DEAD_LETTER_STREAM} after repeated failures")
+        await redis.xadd(DEAD_LETTER_STREAM, {**fields, "stream": stream, "entry_id": entry_id})
+        await redis.xack(stream, GROUP, entry_id)
+        self.stats["dead_lettered"] += 1
+
+    async def _process_entries(self, entries: list):
+        """
+        Deliver consecutive entries of a conversation as one message, retrying in place with backoff,
+        and acknowledge them once delivered or dead-lettered.
+        """
+        _, entry_id, fields = entries[-1]
+        platform = fields.get("platform")
+        payloads = [json.loads(entry_fields["payload"]) for _, _, entry_fields in entries]
+        if len(entries) > 1:
+            self.stats["merged"] += len(entries) - 1
+            logger.info(f"Merging {len(entries)} queued messages of {fields.get('partition_key')} into one reply")
+        # Merged here already; the in-process coalescer would only wait out its window again
+        handler = partial(reply_handlers[platform], coalesce=False, **merge_payloads(payloads))
+
+        for attempt in range(1, INBOUND_STREAM_MAX_DELIVERIES + 1):
+            # Timed from the oldest message, the one that waited longest for the reply
+            timer = timer_for(platform, float(entries[0][2]["received_at"]))
+            try:
+                timer.mark("queued")
+                await handler(timer)
+                break
+            except Exception as e:
+                self.stats["failed"] += 1
+                logger.error(f"Processing inbound entry {entry_id} failed (attempt {attempt}): {e}")
+            finally:
+                timer.finish()
+            if attempt == INBOUND_STREAM_MAX_DELIVERIES:
+                for stream, entry_id, fields in entries:
+                    await self._dead_letter(stream, entry_id, fields)
+                return
+            self.stats["retried"] += 1
+            await asyncio.sleep(INBOUND_STREAM_RETRY_BACKOFF * 2 ** (attempt - 1))
+        redis = get_async_redis()
+        for stream, entry_id, _ in entries:
+            await redis.xack(stream, GROUP, entry_id)
+        self.stats["processed"] += len(entries)
+
+
+inbound_consumer = InboundStreamConsumer()
+
+register_metrics("inbound_consumer", inbound_consumer.snapshot)
+
+
+async def main():
+    setup_logging()
+    await config_change_listener.start()
+    await account_registry.start(platforms.values())
+    await inbound_consumer.start()
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await inbound_consumer.stop()
+        await account_registry.stop()
+        await config_change_listener.stop()
+        await message_coalescer.stop()
+        await run_supervisor.drain()
+        await whatsapp_service.whatsapp_send_queue.stop()
+        await instagram_service.instagram_send_queue.stop()
+        await http_clients.aclose()
+
+
+if __name__ == "__main__":
+    # Standalone consumer: python -m src.messengers.inbound_consumer
+    asyncio.run(main())
@@ -0,0 +1,288 @@
+import asyncio
+import json
+import logging
+import time
+from typing import Awaitable, Callable, Optional
+
+import httpx
+
+from src.core.config import (
+    GRAPH_USAGE_SLOWDOWN,
+    GRAPH_USAGE_LIMIT,
+    GRAPH_USAGE_MAX_DELAY,
+    GRAPH_USAGE_STALE,
+    GRAPH_THROTTLE_BACKOFF,
+    INSTAGRAM_SEND_QUEUE_SIZE,
+    INSTAGRAM_SEND_RETRIES,
+)
+from src.core.http_clients import http_clients, GRAPH_INSTAGRAM
+from src.utils.errors_handler import ExternalServiceError
+from src.utils.metrics import register_metrics
+
+
+logger = logging.getLogger(__name__)
+
+# Graph error codes of rate limited calls: app-wide, and per account/page
+APP_THROTTLE_CODES = {4}
+ACCOUNT_THROTTLE_CODES = {17, 32, 613, 80002}
+
+
+def _usage_percent(usage: dict) -> float:
+    return max(float(usage.get(field) or 0) for field in ("call_count", "total_cputime", "total_time"))
+
+
+def _node_id(request: httpx.Request) -> Optional[str]:
+    """
+    Graph node a request was made on, e.g. the page id of /v21.0/{page_id}/messages.
+    """
+    parts = [part for part in request.url.path.split("/") if part]
+    if parts and parts[0].startswith("v") and parts[0][1:2].isdigit():
+        parts = parts[1:]
+    return parts[0] if parts else None
+
+
+class _Usage:
+    def __init__(self) -> None:
+        self.percent = 0.0
+        self.observed_at = 0.0
+        self.blocked_until = 0.0
+
+    def current(self, now: float) -> float:
+        # Usage is reported over a rolling window; an old reading says little, the next call refreshes it
+        return self.percent if now - self.observed_at < GRAPH_USAGE_STALE else 0.0
+
+
+class GraphUsageTracker:
+    """
+    Graph API utilization, from the usage headers of every response of the shared Graph client:
+    X-App-Usage for the app as a whole, X-Business-Use-Case-Usage per page.
+    """
+
+    def __init__(self) -> None:
+        self._app = _Usage()
+        self._pages: dict[str, _Usage] = {}
+        self.stats = {"throttled": 0, "header_errors": 0}
+
+    def snapshot(self) -> dict:
+        now = time.monotonic()
+        return {
+            **self.stats,
+            "app": self._app.current(now),
+            "pages": {
+                page_id: {
+                    "utilization": self.utilization(page_id),
+                    "blocked_for": round(max(usage.blocked_until - now, 0), 1),
+                }
+                for page_id, usage in self._pages.items()
+                if usage.current(now) or usage.blocked_until > now
+            },
+        }
+
+    def _page(self, page_id: str) -> _Usage:
+        usage = self._pages.get(page_id)
+        if usage is None:
+            usage = self._pages[page_id] = _Usage()
+        return usage
+
+    def utilization(self, page_id: str) -> float:
+        """
+        Highest reported percentage of the app or page limits still valid for page_id.
+        """
+        now = time.monotonic()
+        page = self._pages.get(page_id)
+        return max(self._app.current(now), page.current(now) if page is not None else 0.0)
+
+    def delay(self, page_id: str, last_sent_at: float = None) -> float:
+        """
+        Seconds to wait before the next call for page_id: until access is regained when throttled,
+        until the reading goes stale above GRAPH_USAGE_LIMIT, and a spacing since last_sent_at
+        growing from 0 to GRAPH_USAGE_MAX_DELAY between GRAPH_USAGE_SLOWDOWN and GRAPH_USAGE_LIMIT.
+        """
+        now = time.monotonic()
+        page = self._pages.get(page_id) or _Usage()
+        blocked_until = max(self._app.blocked_until, page.blocked_until)
+        if blocked_until > now:
+            return blocked_until - now
+
+        if page.current(now) >= GRAPH_USAGE_LIMIT:
+            return page.observed_at + GRAPH_USAGE_STALE - now
+        if self._app.current(now) >= GRAPH_USAGE_LIMIT:
+            return self._app.observed_at + GRAPH_USAGE_STALE - now
+
+        utilization = self.utilization(page_id)
+        if utilization < GRAPH_USAGE_SLOWDOWN or last_sent_at is None:
+            return 0.0
+        spacing = GRAPH_USAGE_MAX_DELAY * (utilization - GRAPH_USAGE_SLOWDOWN) / (GRAPH_USAGE_LIMIT - GRAPH_USAGE_SLOWDOWN)
+        return max(last_sent_at + spacing - now, 0.0)
+
+    async def observe(self, response: httpx.Response):
+        """
+        Response hook of the Graph client. Never raises, a bad header must not fail the call.
+        """
+        try:
+            await self._observe(response)
+        except Exception as e:
+            self.stats["header_errors"] += 1
+            logger.warning(f"Could not read Graph API usage headers: {e}")
+
+    async def _observe(self, response: httpx.Response):
+        now = time.monotonic()
+        app_usage = response.headers.get("x-app-usage")
+        if app_usage:
+            self._app.percent = _usage_percent(json.loads(app_usage))
+            self._app.observed_at = now
+
+        regained = False
+        business_usage = response.headers.get("x-business-use-case-usage")
+        if business_usage:
+            for page_id, usages in json.loads(business_usage).items():
+                page = self._page(page_id)
+                page.percent = max((_usage_percent(usage) for usage in usages), default=0.0)
+                page.observed_at = now
+                # Minutes until a throttled page may call again
+                regain_minutes = max((usage.get("estimated_time_to_regain_access") or 0 for usage in usages), default=0)
+                if regain_minutes:
+                    page.blocked_until = max(page.blocked_until, now + regain_minutes * 60)
+                    regained = True
+
+        if response.status_code < 400:
+            return
+        await response.aread()
+        code = (response.json().get("error") or {}).get("code")
+        if code in APP_THROTTLE_CODES:
+            self.stats["throttled"] += 1
+            logger.warning(f"Graph API app rate limit reached, pausing Instagram sends for {GRAPH_THROTTLE_BACKOFF}s")
+            self._app.blocked_until = max(self._app.blocked_until, now + GRAPH_THROTTLE_BACKOFF)
+        elif code in ACCOUNT_THROTTLE_CODES or response.status_code == 429:
+            self.stats["throttled"] += 1
+            page_id = _node_id(response.request)
+            if page_id is not None and not regained:
+                page = self._page(page_id)
+                page.blocked_until = max(page.blocked_until, now + GRAPH_THROTTLE_BACKOFF)
+            logger.warning(f"Graph API rate limit reached for {page_id}, pausing its sends")
+
+
+def is_throttled(error: ExternalServiceError) -> bool:
+    """
+    Whether a failed Graph call was rejected for rate limiting, and so may succeed once access is regained.
+    """
+    return error.status_code == 429 or error.error_code in APP_THROTTLE_CODES | ACCOUNT_THROTTLE_CODES
+
+
+class _PageLane:
+    def __init__(self) -> None:
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=INSTAGRAM_SEND_QUEUE_SIZE)
+        self.worker: asyncio.Task = None
+        self.last_sent_at: float = None
+
+
+class GraphSendQueue:
+    """
+    Paces a page's messages by GraphUsageTracker.delay, so traffic slows down before the Graph
+    limits instead of running into them. Sends within the budget go out right away; once a delay
+    applies they wait, in order, in the page's queue. Sends rejected as throttled are retried
+    once access is regained.
+    """
+
+    def __init__(self, usage: GraphUsageTracker) -> None:
+        self.usage = usage
+        self._lanes: dict[str, _PageLane] = {}
+        self.stats = {"sent": 0, "delayed": 0, "retries": 0, "rejected": 0, "failed_on_stop": 0}
+
+    def snapshot(self) -> dict:
+        return {
+            **self.stats,
+            "queued": {page_id: lane.queue.qsize() for page_id, lane in self._lanes.items() if lane.queue.qsize()},
+        }
+
+    async def send(self, page_id: str, call: Callable[[], Awaitable]):
+        """
+        Run call, which makes one Graph request for page_id, now if the page is within its budget,
+        otherwise once its turn in the page's queue comes. Returns the call's result.
+        Raises ExternalServiceError when the page's queue is full.
+        """
+        lane = self._lanes.get(page_id)
+        if lane is None:
+            lane = self._lanes[page_id] = _PageLane()
+        idle = lane.queue.empty() and (lane.worker is None or lane.worker.done())
+        if idle and self.usage.delay(page_id, lane.last_sent_at) <= 0:
+            return await self._call(page_id, lane, call)
+
+        future = asyncio.get_running_loop().create_future()
+        try:
+            lane.queue.put_nowait((call, future))
+        except asyncio.QueueFull:
+            self.stats["rejected"] += 1
+            raise ExternalServiceError(f"Instagram send queue of page {page_id} is full.")
+        if lane.worker is None or lane.worker.done():
+            lane.worker = asyncio.create_task(self._work(page_id, lane), name=f"instagram-send-{page_id}")
+        return await future
+
+    async def stop(self, timeout: float = 10):
+        """
+        Give queued sends up to timeout seconds to go out, then cancel the workers; sends
+        still queued by then fail with ExternalServiceError.
+        """
+        workers = [lane.worker for lane in self._lanes.values() if lane.worker is not None and not lane.worker.done()]
+        if not workers:
+            return
+        _, pending = await asyncio.wait(workers, timeout=timeout)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+    async def _work(self, page_id: str, lane: _PageLane):
+        # Exits once the queue is drained; send() starts a new worker for the next message
+        future = None
+        try:
+            while not lane.queue.empty():
+                call, future = lane.queue.get_nowait()
+                if future.done():
+                    continue
+                try:
+                    result = await self._call(page_id, lane, call)
+                except Exception as e:
+                    if not future.done():
+                        future.set_exception(e)
+                    continue
+                if not future.done():
+                    future.set_result(result)
+        finally:
+            # Only left early when cancelled by stop(); the callers must not wait forever
+            waiting = [future] if future is not None else []
+            while not lane.queue.empty():
+                waiting.append(lane.queue.get_nowait()[1])
+            for pending in waiting:
+                if not pending.done():
+                    self.stats["failed_on_stop"] += 1
+                    pending.set_exception(ExternalServiceError(f"Instagram sends of page {page_id} were stopped."))
+
+    async def _call(self, page_id: str, lane: _PageLane, call: Callable[[], Awaitable]):
+        for attempt in range(INSTAGRAM_SEND_RETRIES + 1):
+            wait = self.usage.delay(page_id, lane.last_sent_at)
+            if wait > 0:
+                self.stats["delayed"] += 1
+                logger.info(
+                    f"Delaying Instagram send of page {page_id} by {wait:.1f}s "
+                    f"at {self.usage.utilization(page_id):.0f}% Graph API usage"
+                )
+                await asyncio.sleep(wait)
+            lane.last_sent_at = time.monotonic()
+            try:
+                result = await call()
+            except ExternalServiceError as e:
+                # Other errors, e.g. an invalid recipient, fail the same way on every attempt
+                if attempt == INSTAGRAM_SEND_RETRIES or not is_throttled(e):
+                    raise
+                self.stats["retries"] += 1
+                continue
+            self.stats["sent"] += 1
+            return result
+
+
+graph_usage = GraphUsageTracker()
+instagram_send_queue = GraphSendQueue(graph_usage)
+
+http_clients.add_response_hook(GRAPH_INSTAGRAM, graph_usage.observe)
+
+register_metrics("graph_usage", lambda: {**graph_usage.snapshot(), "sends": instagram_send_queue.snapshot()})
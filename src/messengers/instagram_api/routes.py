@@ -3,7 +3,6 @@ from fastapi.responses import PlainTextResponse, RedirectResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from celery.result import AsyncResult
 
-from src.bots.openai.service import handle_incoming_message
 from src.tasks.app_setup_task import app_setup_task
 from src.core.celery_setup import celery
 import logging
@@ -13,18 +12,13 @@ from src.db.repositories.instagram_app_repositories import (
     get_instagram_credentials,
     get_app_verify_token
 )
-from src.db.repositories.instagram_user_repositories import (
-    create_instagram_account,
-    get_instagram_account_user_by_id
-)
+from src.db.repositories.instagram_user_repositories import create_instagram_account
 from src.messengers.instagram_api.utils import extract_code_from_url
-from src.messengers.instagram_api.schemas import (
-    WebhookObject,
-    AppSetupRequest,
-)
+from src.messengers.instagram_api.schemas import AppSetupRequest
 from src.messengers.instagram_api.token import InstagramAuth
 from src.messengers.instagram_api.user import get_instagram_user_info
-from src.messengers.instagram_api.service import send_instagram_message
+from src.messengers.pipeline import ingest
+from src.messengers.instagram_api import service as instagram_service  # noqa: F401, registers the instagram pipeline adapter
 
 # Import your custom exceptions
 from src.utils.errors_handler import (
@@ -62,10 +56,10 @@ async def handle_code(
             client_secret=instagram_app_secret,
             redirect_uri=redirect_uri
         )
-        short_lived_token = instagram_auth.get_short_access_token(code)
+        short_lived_token = await instagram_auth.get_short_access_token(code)
         print(short_lived_token)
-        long_lived_token = instagram_auth.get_long_lived_access_token(short_lived_token)
-        user = get_instagram_user_info(long_lived_token)
+        long_lived_token = await instagram_auth.get_long_lived_access_token(short_lived_token)
+        user = await get_instagram_user_info(long_lived_token)
         username= user['username']
         user_id = user['user_id']
         logger.info(f"Instagram user {username} retrieved successfully")
@@ -103,64 +97,16 @@ async def verify_token(
 
 # Webhook Event Handler Endpoint
 @instagram_api_router.post("/webhook")
-async def handle_webhook(
-        request: Request,
-        db: AsyncSession = Depends(get_async_db)
-):
+async def handle_webhook(request: Request):
+    """
+    Run the webhook through the ingress stages of the pipeline and acknowledge right away.
+    """
     try:
         data = await request.json()
         logger.info(f"Webhook event received: {data}")
-
-        try:
-            webhook_event = WebhookObject(**data)
-        except Exception as e:
-            logger.error(f"Error parsing webhook data: {e}")
-            raise InvalidWebhookPayload()
-
-        if webhook_event.object != "instagram":
-            logger.warning("Non-instagram webhook object received.")
-            # Optionally do nothing or raise an exception
-            pass
-
-        for entry in webhook_event.entry:
-            page_id = entry.id  # Extract the page_id dynamically
-            page = await get_instagram_account_user_by_id(db, page_id)
-            if page is None:
-                logger.warning(f"No matching Instagram account for page_id: {page_id}")
-                continue
-            page_access_token = page.access_token
-            assistant_id = page.bot_id
-            for messaging_event in entry.messaging:
-                # Skip messages that are echoes
-                if messaging_event.message.get("is_echo"):
-                    logger.info(f"Skipping echo message: {messaging_event.message}")
-                    continue
-
-                sender_id = messaging_event.sender.get("id")
-                message_text = messaging_event.message.get("text")
-
-                if message_text:
-                    logger.info(
-                        f"Forwarding message to external service: {message_text} from {sender_id}"
-                    )
-                    # Process the incoming message
-                    response = await handle_incoming_message(
-                        db=db,
-                        sender_id=sender_id,
-                        owner_id=page_id,
-                        assistant_id=assistant_id,
-                        message=message_text,
-                        platform="instagram",
-                    )
-                    logger.info(f"Response for sender {sender_id}: {response['response']}")
-                    await send_instagram_message(
-                        page_token=page_access_token,
-                        page_id=page_id,
-                        recipient_id=sender_id,
-                        message=response['response']
-                    )
-        return {"status": "success"}
-    except InvalidWebhookPayload:
+        result = await ingest("instagram", data)
+        return {"status": "success", **result}
+    except (InvalidWebhookPayload, InternalServerError):
         # Re-raise so the custom handler catches it
         raise
     except Exception as e:
@@ -1,6 +1,15 @@
 import httpx
 import logging
-from src.utils.errors_handler import ExternalServiceError
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.http_clients import http_clients, GRAPH_INSTAGRAM
+from src.db.repositories.instagram_user_repositories import get_instagram_accounts_by_ids, get_all_instagram_accounts
+from src.messengers.account_registry import AccountRoute
+from src.messengers.instagram_api.graph_usage import instagram_send_queue
+from src.messengers.instagram_api.schemas import WebhookObject
+from src.messengers.pipeline import InboundMessage, PlatformAdapter, register_platform
+from src.utils.errors_handler import ExternalServiceError, InvalidWebhookPayload
 
 logger = logging.getLogger(__name__)
 
@@ -9,7 +18,7 @@ async def send_instagram_message(page_token: str, page_id: str, recipient_id: st
     """
     Sends a message to the customer via Instagram Graph API.
     """
-    url = f"https://graph.instagram.com/v21.0/{page_id}/messages"
+    url = f"/v21.0/{page_id}/messages"
 
     payload = {
         "recipient": {"id": recipient_id},
@@ -21,25 +30,91 @@ async def send_instagram_message(page_token: str, page_id: str, recipient_id: st
         "Authorization": f"Bearer {page_token}",
     }
 
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.post(url, json=payload, headers=headers)
-            # Raises httpx.HTTPStatusError if status code >= 400
-            response.raise_for_status()
-            logger.info(f"Message sent successfully to {recipient_id}: {response.json()}")
-            return response.json()
-
-        except httpx.RequestError as e:
-            # Any error in connecting to the server
-            logger.error(f"Request error while sending Instagram message: {e}")
-            raise ExternalServiceError(f"Request error while sending IG message: {e}") from e
-
-        except httpx.HTTPStatusError as e:
-            # Status code >= 400
-            logger.error(f"HTTP error while sending Instagram message: {e.response.json()}")
-            raise ExternalServiceError(
-                f"HTTP error while sending IG message: {e.response.json()}"
-            ) from e
+    client = http_clients.get(GRAPH_INSTAGRAM)
+    try:
+        response = await client.post(url, json=payload, headers=headers)
+        # Raises httpx.HTTPStatusError if status code >= 400
+        response.raise_for_status()
+        logger.info(f"Message sent successfully to {recipient_id}: {response.json()}")
+        return response.json()
+
+    except httpx.RequestError as e:
+        # Any error in connecting to the server
+        logger.error(f"Request error while sending Instagram message: {e}")
+        raise ExternalServiceError(f"Request error while sending IG message: {e}") from e
+
+    except httpx.HTTPStatusError as e:
+        # Status code >= 400
+        error = e.response.json()
+        logger.error(f"HTTP error while sending Instagram message: {error}")
+        raise ExternalServiceError(
+            f"HTTP error while sending IG message: {error}",
+            status_code=e.response.status_code,
+            error_code=(error.get("error") or {}).get("code"),
+        ) from e
+
+
+def decode_instagram_webhook(data: dict) -> list[InboundMessage]:
+    """
+    Turn an Instagram webhook payload into one envelope per messaging event.
+    """
+    try:
+        webhook_event = WebhookObject(**data)
+    except Exception as e:
+        logger.error(f"Error parsing webhook data: {e}")
+        raise InvalidWebhookPayload()
+
+    if webhook_event.object != "instagram":
+        logger.warning("Non-instagram webhook object received.")
+
+    messages = []
+    for entry in webhook_event.entry:
+        page_id = entry.id  # Extract the page_id dynamically
+        for messaging_event in entry.messaging:
+            messages.append(InboundMessage(
+                platform="instagram",
+                # Echoes of the page's own messages
+                event_type="echo" if messaging_event.message.get("is_echo") else "message",
+                account_id=page_id,
+                owner_id=page_id,
+                sender_id=messaging_event.sender.get("id"),
+                text=messaging_event.message.get("text"),
+                message_id=messaging_event.message.get("mid"),
+            ))
+    return messages
+
+
+def _instagram_route(page) -> AccountRoute:
+    return AccountRoute(platform="instagram", account_id=page.user_id, bot_id=page.bot_id, access_token=page.access_token)
+
+
+async def resolve_instagram_accounts(db: AsyncSession, page_ids: list[str]) -> dict:
+    pages = await get_instagram_accounts_by_ids(db, page_ids)
+    return {page_id: _instagram_route(page) for page_id, page in pages.items()}
+
+
+async def list_instagram_accounts(db: AsyncSession) -> dict:
+    return {page.user_id: _instagram_route(page) for page in await get_all_instagram_accounts(db)}
+
+
+async def send_instagram_reply(page: AccountRoute, message: InboundMessage, text: str):
+    # Paced by the page's Graph API usage
+    await instagram_send_queue.send(message.account_id, lambda: send_instagram_message(
+        page_token=page.access_token,
+        page_id=message.account_id,
+        recipient_id=message.sender_id,
+        message=text,
+    ))
+
+
+register_platform(PlatformAdapter(
+    "instagram",
+    decode=decode_instagram_webhook,
+    resolve_accounts=resolve_instagram_accounts,
+    list_accounts=list_instagram_accounts,
+    send=send_instagram_reply,
+))
+
 
 #
 # async def forward_message_to_service(
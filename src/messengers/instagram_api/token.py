@@ -1,6 +1,7 @@
-import requests
+import httpx
 import logging
 
+from src.core.http_clients import http_clients, GRAPH_INSTAGRAM, INSTAGRAM_API
 from src.utils.errors_handler import ExternalServiceError
 
 
@@ -13,11 +14,11 @@ class InstagramAuth:
         self.client_secret = client_secret
         self.redirect_uri = redirect_uri
 
-    def get_short_access_token(self, code):
+    async def get_short_access_token(self, code):
         """
         Exchange the authorization code for a short-lived access token.
         """
-        url = 'https://api.instagram.com/oauth/access_token'
+        url = '/oauth/access_token'
         payload = {
             'client_id': self.client_id,
             'client_secret': self.client_secret,
@@ -28,8 +29,8 @@ class InstagramAuth:
 
 
         try:
-            response = requests.post(url, data=payload)
-        except requests.exceptions.RequestException as e:
+            response = await http_clients.get(INSTAGRAM_API).post(url, data=payload)
+        except httpx.RequestError as e:
             # Catches any network-level error (connection refused, DNS failure, etc.)
             logger.error(f"Request error while fetching short-lived token: {e}")
             raise ExternalServiceError("Failed to communicate with Instagram OAuth endpoint") from e
@@ -45,11 +46,11 @@ class InstagramAuth:
             )
 
 
-    def get_long_lived_access_token(self, short_lived_token: str) -> str:
+    async def get_long_lived_access_token(self, short_lived_token: str) -> str:
         """
         Exchange a short-lived token for a long-lived access token.
         """
-        url = "https://graph.instagram.com/access_token"
+        url = "/access_token"
         params = {
             "grant_type": "ig_exchange_token",
             "client_secret": self.client_secret,
@@ -57,9 +58,9 @@ class InstagramAuth:
         }
 
         try:
-            response = requests.get(url, params=params)
+            response = await http_clients.get(GRAPH_INSTAGRAM).get(url, params=params)
             print(response.text)
-        except requests.exceptions.RequestException as e:
+        except httpx.RequestError as e:
             logger.error(f"Request error while fetching long-lived token: {e}")
             raise ExternalServiceError("Failed to communicate with Instagram Graph endpoint") from e
 
@@ -74,19 +75,19 @@ class InstagramAuth:
             )
 
 
-    def refresh_long_lived_token(self, long_lived_access_token: str) -> str:
+    async def refresh_long_lived_token(self, long_lived_access_token: str) -> str:
         """
         Refresh a long-lived access token.
         """
-        url = "https://graph.instagram.com/refresh_access_token"
+        url = "/refresh_access_token"
         params = {
             "grant_type": "ig_refresh_token",
             "access_token": long_lived_access_token,
         }
 
         try:
-            response = requests.get(url, params=params)
-        except requests.exceptions.RequestException as e:
+            response = await http_clients.get(GRAPH_INSTAGRAM).get(url, params=params)
+        except httpx.RequestError as e:
             logger.error(f"Request error while refreshing long-lived token: {e}")
             raise ExternalServiceError("Failed to communicate with Instagram Graph endpoint") from e
 
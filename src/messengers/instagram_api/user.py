@@ -1,25 +1,26 @@
 # src/instagram_api/user.py
 
-import requests
+import httpx
 import logging
 
+from src.core.http_clients import http_clients, GRAPH_INSTAGRAM
 from src.utils.errors_handler import ExternalServiceError
 
 logger = logging.getLogger(__name__)
 
-def get_instagram_user_info(access_token: str) -> dict:
+async def get_instagram_user_info(access_token: str) -> dict:
     """
     Retrieve user info (user_id, username, account_type) from the Instagram Graph API.
     """
-    url = "https://graph.instagram.com/v21.0/me"
+    url = "/v21.0/me"
     params = {
         "fields": "user_id,username,account_type",
         "access_token": access_token,
     }
 
     try:
-        response = requests.get(url, params=params)
-    except requests.exceptions.RequestException as e:
+        response = await http_clients.get(GRAPH_INSTAGRAM).get(url, params=params)
+    except httpx.RequestError as e:
         # Network-level error (DNS, connection refused, etc.)
         logger.error(f"Request error while fetching Instagram user info: {e}")
         raise ExternalServiceError("Failed to communicate with Instagram Graph endpoint") from e
@@ -35,18 +36,18 @@ def get_instagram_user_info(access_token: str) -> dict:
         )
 
 
-def get_instagram_media(instagram_id: str, access_token: str) -> dict:
+async def get_instagram_media(instagram_id: str, access_token: str) -> dict:
     """
     Retrieve media data for a given Instagram ID from the Instagram Graph API.
     """
-    url = f"https://graph.instagram.com/v21.0/{instagram_id}/media"
+    url = f"/v21.0/{instagram_id}/media"
     params = {
         "access_token": access_token,
     }
 
     try:
-        response = requests.get(url, params=params)
-    except requests.exceptions.RequestException as e:
+        response = await http_clients.get(GRAPH_INSTAGRAM).get(url, params=params)
+    except httpx.RequestError as e:
         logger.error(f"Request error while fetching Instagram media: {e}")
         raise ExternalServiceError("Failed to communicate with Instagram Graph endpoint") from e
 
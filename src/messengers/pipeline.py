@@ -0,0 +1,207 @@
+import logging
+import time
+from typing import Any, Awaitable, Callable, Optional
+
+from pydantic import BaseModel, Field
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.bots.openai.service import handle_incoming_message
+from src.core.config import INBOUND_BATCH_CONCURRENCY
+from src.core.database_setup import AsyncSessionLocal
+from src.messengers.account_registry import AccountRoute, account_registry
+from src.messengers.background import reply_latency
+from src.messengers.dedup import claim_message, release_message
+from src.messengers.event_stream import publish_event, register_reply_handler, account_stream
+from src.utils.errors_handler import InternalServerError
+from src.utils.concurrency import gather_by_key
+from src.utils.metrics import register_metrics, StageTimer
+
+
+logger = logging.getLogger(__name__)
+
+
+class InboundMessage(BaseModel):
+    """
+    Platform-independent envelope of one inbound event.
+    """
+    platform: str
+    event_type: str = "message"
+    account_id: str  # Id the connected account is looked up by (page id, idInstance, Telegram user id)
+    owner_id: Optional[str] = None  # Owner side of the conversation, as stored on threads
+    sender_id: Optional[str] = None
+    chat_id: Optional[str] = None  # Where the reply goes when it is not sender_id
+    text: Optional[str] = None
+    message_id: Optional[str] = None
+    received_at: float = Field(default_factory=time.time)
+
+    @property
+    def conversation_key(self) -> str:
+        return f"{self.platform}:{self.account_id}:{self.sender_id}"
+
+    @property
+    def dedup_key(self) -> Optional[str]:
+        return f"{self.account_id}:{self.message_id}" if self.message_id else None
+
+
+class PlatformAdapter:
+    """
+    The platform specific stages of the pipeline:
+    decode(raw) -> list[InboundMessage], without I/O;
+    resolve_accounts(db, account_ids) -> {account_id: AccountRoute}, one query for many ids;
+    list_accounts(db) -> every {account_id: AccountRoute}, to warm the account registry;
+    send(route, message, text) delivers the reply;
+    check(message), optional, raises when this process cannot deliver the message at all;
+    local: replies need state only the receiving process holds (e.g. a connected client), so
+    events go to the account's own stream, read by the process that called read_locally for it.
+    """
+
+    def __init__(
+        self,
+        platform: str,
+        decode: Callable[[Any], list[InboundMessage]],
+        resolve_accounts: Callable[[AsyncSession, list[str]], Awaitable[dict[str, AccountRoute]]],
+        list_accounts: Callable[[AsyncSession], Awaitable[dict[str, AccountRoute]]],
+        send: Callable[[AccountRoute, InboundMessage, str], Awaitable[None]],
+        check: Callable[[InboundMessage], None] = None,
+        local: bool = False,
+    ) -> None:
+        self.platform = platform
+        self.decode = decode
+        self.resolve_accounts = resolve_accounts
+        self.list_accounts = list_accounts
+        self.send = send
+        self.check = check
+        self.local = local
+
+
+platforms: dict[str, PlatformAdapter] = {}
+pipeline_stats = {"accepted": 0, "filtered": 0, "duplicates": 0, "no_account": 0, "coalesced": 0}
+
+register_metrics("pipeline", lambda: dict(pipeline_stats))
+
+
+def register_platform(adapter: PlatformAdapter):
+    platforms[adapter.platform] = adapter
+    register_reply_handler(adapter.platform, deliver)
+
+
+def _only_messages(message: InboundMessage) -> Optional[str]:
+    return None if message.event_type == "message" else f"{message.event_type} event"
+
+
+def _has_text(message: InboundMessage) -> Optional[str]:
+    return None if message.text else "no text"
+
+
+def _has_sender(message: InboundMessage) -> Optional[str]:
+    return None if message.sender_id else "no sender"
+
+
+# Cheap checks run before any I/O; each returns why the message is dropped, or None to keep it
+triage_filters: list[Callable[[InboundMessage], Optional[str]]] = [_only_messages, _has_text, _has_sender]
+
+
+def triage(message: InboundMessage) -> bool:
+    for check in triage_filters:
+        reason = check(message)
+        if reason is not None:
+            logger.info(f"Skipping {message.platform} message {message.message_id}: {reason}")
+            return False
+    return True
+
+
+async def ingest(platform: str, raw: Any) -> dict:
+    """
+    Ingress stages: decode, triage, then dedup and enqueue to the inbound stream for each message.
+    Raises InvalidWebhookPayload from decode, and InternalServerError if a message could not be queued,
+    so the platform redelivers it.
+    """
+    adapter = platforms[platform]
+    timer = StageTimer(reply_latency, f"{platform}.ingress")
+    result = {"accepted": 0, "filtered": 0, "duplicates": 0}
+
+    messages = adapter.decode(raw)
+    timer.mark("decode")
+
+    candidates = [message for message in messages if triage(message)]
+    result["filtered"] = len(messages) - len(candidates)
+    timer.mark("triage")
+
+    failed = []
+
+    async def admit(message: InboundMessage):
+        started = time.perf_counter()
+        claimed = await claim_message(platform, message.dedup_key)
+        claimed_at = time.perf_counter()
+        reply_latency.record(f"{platform}.ingress.dedup", claimed_at - started)
+        if not claimed:
+            result["duplicates"] += 1
+            return
+        stream = account_stream(platform, message.account_id) if adapter.local else None
+        if await publish_event(platform, message.conversation_key, message.model_dump(), stream=stream):
+            result["accepted"] += 1
+        else:
+            await release_message(platform, message.dedup_key)
+            failed.append(message)
+        reply_latency.record(f"{platform}.ingress.enqueue", time.perf_counter() - claimed_at)
+
+    # Senders of a batch are admitted concurrently; a sender's messages stay in order on the stream
+    senders = await gather_by_key(candidates, lambda message: message.conversation_key, admit, INBOUND_BATCH_CONCURRENCY)
+    timer.mark("admit")
+    total = timer.finish()
+    if len(messages) > 1:
+        logger.info(
+            f"Ingested {platform} batch of {len(messages)} events from {senders} senders in {total * 1000:.1f} ms: {result}"
+        )
+
+    for key in result:
+        pipeline_stats[key] += result[key]
+    if failed:
+        raise InternalServerError(f"Could not queue {len(failed)} {platform} messages.")
+    return result
+
+
+def merge_payloads(payloads: list[dict]) -> dict:
+    """
+    One message of a conversation out of several consecutive ones: their texts joined,
+    the rest (message id, reply target) from the latest.
+    """
+    return {**payloads[-1], "text": "\n".join(payload["text"] for payload in payloads if payload.get("text"))}
+
+
+async def deliver(timer: StageTimer, coalesce: bool = True, **payload):
+    """
+    Worker stages for one queued message: account resolution, reply and send.
+    coalesce=False when the message was already merged by merge_payloads.
+    """
+    message = InboundMessage(**payload)
+    adapter = platforms[message.platform]
+    if adapter.check is not None:
+        adapter.check(message)
+
+    account = await account_registry.get(adapter, message.account_id)
+    timer.mark("account")
+    if account is None:
+        pipeline_stats["no_account"] += 1
+        logger.warning(f"No connected {message.platform} account {message.account_id}, dropping message")
+        return
+
+    async with AsyncSessionLocal() as db:
+        response = await handle_incoming_message(
+            db=db,
+            sender_id=message.sender_id,
+            owner_id=message.owner_id,
+            assistant_id=account.bot_id,
+            message=message.text,
+            platform=message.platform,
+            coalesce=coalesce,
+        )
+    timer.mark("reply")
+
+    if response.get("coalesced"):
+        pipeline_stats["coalesced"] += 1
+        logger.info(f"Message from {message.sender_id} merged into a later one, the reply is sent there")
+        return
+    logger.info(f"Response for sender {message.sender_id}: {response['response']}")
+    await adapter.send(account, message, response["response"])
+    timer.mark("send")
@@ -4,19 +4,41 @@ from telethon import TelegramClient, events
 from telethon.sessions import StringSession
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.bots.openai.service import handle_incoming_message
+from src.messengers.account_registry import AccountRoute
+from src.messengers.event_stream import account_stream, read_locally, stop_reading_locally
+from src.messengers.pipeline import InboundMessage, PlatformAdapter, register_platform, ingest
 from src.db.repositories.telegram_app_repositories import (
     get_current_app
 )
 from src.db.repositories.telegram_user_repositories import (
     add_or_update_telegram_user,
     get_user_by_phone,
-    get_telegram_user_by_id,
+    get_telegram_users_by_ids,
+    get_logged_in_telegram_users,
 )
 from src.utils.errors_handler import InternalServerError, TelegramMessageHandlingError
 
 logger = logging.getLogger(__name__)
 
+# Connected Telethon client of every account listening in this process, by Telegram user id
+telegram_clients: dict[str, TelegramClient] = {}
+
+
+def register_telegram_client(user_id: str, client: TelegramClient):
+    """
+    Make this process the one that answers the account: its events go to the account's
+    stream, which only a process holding the client reads.
+    """
+    if telegram_clients.get(user_id) is not client:
+        telegram_clients[user_id] = client
+        read_locally(account_stream("telegram", user_id))
+
+
+def unregister_telegram_client(user_id: str, client: TelegramClient):
+    if telegram_clients.get(user_id) is client:
+        del telegram_clients[user_id]
+        stop_reading_locally(account_stream("telegram", user_id))
+
 
 async def request_code_service(phone_number: str, db: AsyncSession):
     """
@@ -107,10 +129,15 @@ async def start_listening_service(client: TelegramClient, phone_number: str, db:
     Start the event handler for new messages and run until disconnected.
     """
     init_event_handlers_service(client, db)
+    me = await client.get_me(input_peer=True)
+    user_id = str(me.user_id)
+    register_telegram_client(user_id, client)
     try:
         await client.run_until_disconnected()
     except asyncio.CancelledError:
         logger.info(f"Stopped listening for {phone_number}")
+    finally:
+        unregister_telegram_client(user_id, client)
 
 
 def init_event_handlers_service(client: TelegramClient, db: AsyncSession):
@@ -124,41 +151,13 @@ def init_event_handlers_service(client: TelegramClient, db: AsyncSession):
 
 async def handle_new_message_service(event, client, db: AsyncSession):
     """
-    Handle incoming private messages:
-    - Log them to DB
-    - Create a response and send it back
+    Feed an incoming message into the inbound pipeline; the reply is sent by send_telegram_reply.
     """
     try:
-        if event.is_private:
-            print("listenTGinside")
-            logger.debug(f"New private message event: {event}")
-            me = await client.get_me()
-            user_id = me.id if me else "unknown_userid"
-            sender_id = event.sender_id
-            message_text = event.raw_text
-
-            user = await get_telegram_user_by_id(db, user_id)
-            if not user:
-                logger.warning(f"No DB user record found for Telegram user_id={user_id}")
-            assistant_id = user.bot_id
-
-            logger.info(f"Message received from {sender_id}: {message_text}")
-
-            response = await handle_incoming_message(
-                        db=db,
-                        sender_id=sender_id,
-                        owner_id=user_id,
-                        assistant_id=assistant_id,
-                        message=message_text,
-                        platform="telegram",
-                    )
-            # Fallback if no valid response
-            if not response['response']:
-                logger.warning(f"No valid response received for input: {message_text}")
-                response = "No response provided"
-
-            # Reply to the user in Telegram
-            await event.reply(response['response'])
+        me = await client.get_me(input_peer=True)
+        user_id = str(me.user_id)
+        register_telegram_client(user_id, client)
+        await ingest("telegram", (user_id, event))
 
     except Exception as e:
         logger.error(f"Error handling message from {event.sender_id}: {e}")
@@ -166,3 +165,58 @@ async def handle_new_message_service(event, client, db: AsyncSession):
         # If this code is purely background (not in a FastAPI route), you can log or re-raise as you wish.
         raise TelegramMessageHandlingError("Error in handle_new_message_service") from e
 
+
+def decode_telegram_event(raw: tuple) -> list[InboundMessage]:
+    user_id, event = raw
+    return [InboundMessage(
+        platform="telegram",
+        # Only private chats are answered
+        event_type="message" if event.is_private else "group_message",
+        account_id=user_id,
+        owner_id=user_id,
+        sender_id=str(event.sender_id),
+        text=event.raw_text,
+        message_id=str(event.id),
+    )]
+
+
+def check_telegram_client(message: InboundMessage):
+    # The account's stream is only read where its client is registered; this catches a client
+    # unregistered since, the entry is retried and then dead-lettered
+    if message.account_id not in telegram_clients:
+        raise TelegramMessageHandlingError(f"No connected Telegram client for account {message.account_id} in this process")
+
+
+def _telegram_route(user) -> AccountRoute:
+    return AccountRoute(platform="telegram", account_id=user.user_id, bot_id=user.bot_id)
+
+
+async def resolve_telegram_accounts(db: AsyncSession, user_ids: list[str]) -> dict:
+    users = await get_telegram_users_by_ids(db, user_ids)
+    return {user_id: _telegram_route(user) for user_id, user in users.items()}
+
+
+async def list_telegram_accounts(db: AsyncSession) -> dict:
+    return {user.user_id: _telegram_route(user) for user in await get_logged_in_telegram_users(db)}
+
+
+async def send_telegram_reply(user: AccountRoute, message: InboundMessage, text: str):
+    # Fallback if no valid response
+    if not text:
+        logger.warning(f"No valid response received for input: {message.text}")
+        text = "No response provided"
+
+    # Reply to the user in Telegram
+    client = telegram_clients[message.account_id]
+    await client.send_message(int(message.sender_id), text, reply_to=int(message.message_id))
+
+
+register_platform(PlatformAdapter(
+    "telegram",
+    decode=decode_telegram_event,
+    resolve_accounts=resolve_telegram_accounts,
+    list_accounts=list_telegram_accounts,
+    send=send_telegram_reply,
+    check=check_telegram_client,
+    local=True,
+))
@@ -0,0 +1,167 @@
+import asyncio
+import logging
+import random
+import time
+from typing import Awaitable, Callable, Optional
+
+from src.core.config import (
+    WHATSAPP_SEND_RATE,
+    WHATSAPP_SEND_BURST,
+    WHATSAPP_SEND_QUEUE_SIZE,
+    WHATSAPP_SEND_RETRIES,
+    WHATSAPP_SEND_BACKOFF,
+    WHATSAPP_SEND_MAX_BACKOFF,
+)
+from src.core.database_setup import AsyncSessionLocal
+from src.db.repositories.whatsapp_dead_letter_repositories import add_whatsapp_dead_letter
+from src.utils.errors_handler import ExternalServiceError
+from src.utils.metrics import LatencyRecorder
+from src.utils.rate_limit import TokenBucket
+
+
+logger = logging.getLogger(__name__)
+
+
+def is_retryable(error: ExternalServiceError) -> bool:
+    """
+    Network errors, throttling and server errors may succeed later; other HTTP errors will not.
+    """
+    return error.status_code is None or error.status_code == 429 or error.status_code >= 500
+
+
+class _InstanceLane:
+    """
+    Outbound queue and token bucket of one Green API instance. The bucket outlives the
+    worker, so an instance that just went idle cannot burst past its rate.
+    """
+
+    def __init__(self) -> None:
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=WHATSAPP_SEND_QUEUE_SIZE)
+        self.bucket = TokenBucket(WHATSAPP_SEND_RATE, WHATSAPP_SEND_BURST)
+        self.worker: asyncio.Task = None
+
+
+class GreenApiSendQueue:
+    """
+    Paces outbound messages per id_instance with a token bucket, in FIFO order, so bursts
+    are spread out here instead of being queued or rejected by Green API. Failed sends are
+    retried with exponential backoff and jitter; sends that still fail are stored in the
+    whatsapp_dead_letters table.
+    """
+
+    def __init__(self, send: Callable[[str, str, str, str, str], Awaitable[dict]]) -> None:
+        self._send = send
+        self._lanes: dict[str, _InstanceLane] = {}
+        self.latency = LatencyRecorder()
+        self.stats = {"sent": 0, "retries": 0, "dead_lettered": 0, "rejected": 0, "abandoned": 0}
+
+    def snapshot(self) -> dict:
+        return {
+            **self.stats,
+            "queued": {id_instance: lane.queue.qsize() for id_instance, lane in self._lanes.items() if lane.queue.qsize()},
+            "latency": self.latency.snapshot(),
+        }
+
+    async def send(self, chat_id: str, message: str, api_url: str, id_instance: str, api_token_instance: str) -> Optional[dict]:
+        """
+        Queue a message and wait until it is sent. Returns the Green API response, or None if the
+        message was dead-lettered. Raises ExternalServiceError when the instance's queue is full.
+        """
+        id_instance = str(id_instance)
+        lane = self._lanes.get(id_instance)
+        if lane is None:
+            lane = self._lanes[id_instance] = _InstanceLane()
+        future = asyncio.get_running_loop().create_future()
+        try:
+            lane.queue.put_nowait(((chat_id, message, api_url, id_instance, api_token_instance), future, time.perf_counter()))
+        except asyncio.QueueFull:
+            self.stats["rejected"] += 1
+            raise ExternalServiceError(f"WhatsApp send queue of instance {id_instance} is full.")
+        if lane.worker is None or lane.worker.done():
+            lane.worker = asyncio.create_task(self._work(id_instance, lane), name=f"whatsapp-send-{id_instance}")
+        return await future
+
+    async def stop(self, timeout: float = 10):
+        """
+        Give queued messages up to timeout seconds to go out, then cancel the workers; messages
+        still queued by then fail with ExternalServiceError.
+        """
+        workers = [lane.worker for lane in self._lanes.values() if lane.worker is not None and not lane.worker.done()]
+        if not workers:
+            return
+        _, pending = await asyncio.wait(workers, timeout=timeout)
+        if pending:
+            logger.warning(f"Stopping WhatsApp sends with {sum(lane.queue.qsize() for lane in self._lanes.values())} messages queued")
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+    async def _work(self, id_instance: str, lane: _InstanceLane):
+        # Exits once the queue is drained; send() starts a new worker for the next message
+        future = None
+        try:
+            while not lane.queue.empty():
+                args, future, enqueued_at = lane.queue.get_nowait()
+                if future.done():
+                    # The caller gave up waiting, e.g. its consumer was stopped; it will be redelivered
+                    self.stats["abandoned"] += 1
+                    continue
+                try:
+                    result = await self._send_with_retries(lane, args, enqueued_at)
+                except Exception as e:
+                    if not future.done():
+                        future.set_exception(e)
+                    continue
+                if not future.done():
+                    future.set_result(result)
+        finally:
+            # Only left early when cancelled by stop(); the callers must not wait forever
+            waiting = [future] if future is not None else []
+            while not lane.queue.empty():
+                waiting.append(lane.queue.get_nowait()[1])
+            for pending in waiting:
+                if not pending.done():
+                    pending.set_exception(ExternalServiceError(f"WhatsApp sends of instance {id_instance} were stopped."))
+
+    async def _send_with_retries(self, lane: _InstanceLane, args: tuple, enqueued_at: float) -> Optional[dict]:
+        chat_id, message, _, id_instance, _ = args
+        for attempt in range(WHATSAPP_SEND_RETRIES + 1):
+            await lane.bucket.acquire()
+            if attempt == 0:
+                self.latency.record("lag", time.perf_counter() - enqueued_at)
+            started = time.perf_counter()
+            try:
+                result = await self._send(*args)
+            except ExternalServiceError as e:
+                error = e
+            else:
+                self.latency.record("send", time.perf_counter() - started)
+                self.stats["sent"] += 1
+                return result
+
+            if not is_retryable(error) or attempt == WHATSAPP_SEND_RETRIES:
+                break
+            self.stats["retries"] += 1
+            backoff = random.uniform(0, min(WHATSAPP_SEND_MAX_BACKOFF, WHATSAPP_SEND_BACKOFF * 2 ** attempt))
+            logger.warning(
+                f"Sending WhatsApp message of instance {id_instance} failed (attempt {attempt + 1}), "
+                f"retrying in {backoff:.1f}s: {error}"
+            )
+            await asyncio.sleep(backoff)
+
+        self.stats["dead_lettered"] += 1
+        logger.error(f"Giving up on WhatsApp message of instance {id_instance} to {chat_id} after {attempt + 1} attempts: {error}")
+        try:
+            async with AsyncSessionLocal() as db:
+                await add_whatsapp_dead_letter(
+                    db,
+                    id_instance=id_instance,
+                    chat_id=chat_id,
+                    message=message,
+                    attempts=attempt + 1,
+                    status_code=error.status_code,
+                    error=str(error),
+                )
+        except Exception as e:
+            logger.error(f"Storing dead-lettered WhatsApp message of instance {id_instance} failed: {e}")
+        return None
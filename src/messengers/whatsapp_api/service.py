@@ -1,39 +1,124 @@
-import asyncio
 import logging
 import httpx
-import requests
 
-from src.utils.errors_handler import ExternalServiceError  # Import your custom exception
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.http_clients import http_clients
+from src.db.repositories.whatsapp_user_repositories import get_whatsapp_users_by_ids, get_all_whatsapp_users
+from src.messengers.account_registry import AccountRoute
+from src.messengers.pipeline import InboundMessage, PlatformAdapter, register_platform
+from src.messengers.whatsapp_api.send_queue import GreenApiSendQueue
+from src.utils.errors_handler import ExternalServiceError, InvalidWebhookPayload  # Import your custom exception
+from src.utils.metrics import register_metrics
 
 logger = logging.getLogger(__name__)
 
 
 async def send_whatsapp_message(chat_id: str, message: str, api_url: str, id_instance: str, api_token_instance: str):
     """
-    Send a WhatsApp message using the Green API (synchronous call).
+    Send a WhatsApp message using the Green API, on the shared pooled client for api_url.
     """
-    url = f"{api_url}/waInstance{id_instance}/sendMessage/{api_token_instance}"
+    url = f"/waInstance{id_instance}/sendMessage/{api_token_instance}"
     payload = {"chatId": chat_id, "message": message}
     headers = {"Content-Type": "application/json"}
 
     try:
-        response = requests.post(url, json=payload, headers=headers)
-        # You may check if response.status_code >= 400 and raise your custom exception as well:
+        response = await http_clients.get(api_url).post(url, json=payload, headers=headers)
         if response.status_code >= 400:
             logger.error(f"Error sending WhatsApp message (HTTP {response.status_code}): {response.text}")
             raise ExternalServiceError(
                 f"Failed to send WhatsApp message. Status code: {response.status_code}, "
-                f"Response: {response.text}"
+                f"Response: {response.text}",
+                status_code=response.status_code,
             )
-        logger.info(f"Message sent. Response: {response.text}")
-        return response.json()
-    except requests.RequestException as e:
-        logger.error(f"RequestException when sending message via Green API: {e}")
+    except ExternalServiceError:
+        raise
+    except httpx.RequestError as e:
+        logger.error(f"RequestError when sending message via Green API: {e}")
         raise ExternalServiceError("Network error while sending WhatsApp message.") from e
     except Exception as e:
         logger.error(f"Unexpected error sending message: {e}")
         raise ExternalServiceError("Unexpected error while sending WhatsApp message.") from e
 
+    # The message is delivered at this point; an odd body must not make it look failed and be resent
+    logger.info(f"Message sent. Response: {response.text}")
+    try:
+        return response.json()
+    except ValueError:
+        return {"text": response.text} if response.text else {}
+
+
+whatsapp_send_queue = GreenApiSendQueue(send_whatsapp_message)
+
+register_metrics("whatsapp_sends", whatsapp_send_queue.snapshot)
+
+
+def decode_whatsapp_webhook(data: dict) -> list[InboundMessage]:
+    """
+    Turn a Green API webhook payload into an envelope. Non-message webhooks (outgoing
+    messages, state changes) are decoded too and dropped at triage.
+    """
+    # Validate payload structure
+    instance_data = data.get("instanceData")
+    if not instance_data or "idInstance" not in instance_data:
+        logger.error(f"Invalid payload structure: {data}")
+        raise InvalidWebhookPayload("idInstance not found in payload structure.")
+
+    id_instance = instance_data.get("idInstance")
+    if not id_instance:
+        logger.error("idInstance missing in instanceData.")
+        raise InvalidWebhookPayload("idInstance is None or empty.")
+
+    webhook_type = data.get("typeWebhook")
+    sender_data = data.get("senderData") or {}
+    return [InboundMessage(
+        platform="whatsapp",
+        event_type="message" if webhook_type == "incomingMessageReceived" else webhook_type,
+        account_id=str(id_instance),
+        owner_id=instance_data.get("wid"),
+        sender_id=sender_data.get("sender"),
+        chat_id=sender_data.get("chatId"),
+        text=(data.get("messageData") or {}).get("extendedTextMessageData", {}).get("text"),
+        message_id=data.get("idMessage"),
+    )]
+
+
+def _whatsapp_route(user) -> AccountRoute:
+    return AccountRoute(
+        platform="whatsapp",
+        account_id=str(user.id_instance),
+        bot_id=user.bot_id,
+        api_url=user.api_url,
+        api_token=user.api_token,
+    )
+
+
+async def resolve_whatsapp_accounts(db: AsyncSession, id_instances: list[str]) -> dict:
+    users = await get_whatsapp_users_by_ids(db, id_instances)
+    return {id_instance: _whatsapp_route(user) for id_instance, user in users.items()}
+
+
+async def list_whatsapp_accounts(db: AsyncSession) -> dict:
+    return {str(user.id_instance): _whatsapp_route(user) for user in await get_all_whatsapp_users(db)}
+
+
+async def send_whatsapp_reply(user: AccountRoute, message: InboundMessage, text: str):
+    await whatsapp_send_queue.send(
+        chat_id=message.chat_id or message.sender_id,
+        message=text,
+        api_url=user.api_url,
+        id_instance=message.account_id,
+        api_token_instance=user.api_token,
+    )
+
+
+register_platform(PlatformAdapter(
+    "whatsapp",
+    decode=decode_whatsapp_webhook,
+    resolve_accounts=resolve_whatsapp_accounts,
+    list_accounts=list_whatsapp_accounts,
+    send=send_whatsapp_reply,
+))
 
 
 #
@@ -0,0 +1,31 @@
+import asyncio
+from typing import Awaitable, Callable, Hashable, Iterable, TypeVar
+
+
+T = TypeVar("T")
+
+
+async def gather_by_key(
+    items: Iterable[T],
+    key: Callable[[T], Hashable],
+    worker: Callable[[T], Awaitable[bool]],
+    limit: int,
+) -> int:
+    """
+    Run worker over items concurrently across keys but in order within a key, with at most
+    `limit` workers in flight. A worker returning False stops the rest of its key's items.
+    Returns the number of distinct keys.
+    """
+    groups: dict[Hashable, list[T]] = {}
+    for item in items:
+        groups.setdefault(key(item), []).append(item)
+    semaphore = asyncio.Semaphore(limit)
+
+    async def run_group(group: list[T]):
+        for item in group:
+            async with semaphore:
+                if await worker(item) is False:
+                    return
+
+    await asyncio.gather(*(run_group(group) for group in groups.values()))
+    return len(groups)
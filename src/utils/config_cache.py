@@ -0,0 +1,141 @@
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable
+
+from src.core.config import APP_CONFIG_CHECK_INTERVAL
+from src.core.redis_setup import get_async_redis, get_sync_redis
+from src.utils.cache import MISSING
+from src.utils.metrics import register_metrics
+
+
+logger = logging.getLogger(__name__)
+
+APP_CONFIG_CHANNEL = "app_config_changes"
+
+_configs: dict[str, "VersionedConfig"] = {}
+
+
+class VersionedConfig:
+    """
+    Process-local copy of a rarely changing config row. Reads are served from memory. An
+    invalidation drops the copy in every process subscribed through config_change_listener
+    right away; as a fallback, at most every `check_interval` seconds the version counter in
+    Redis is compared, and the value is reloaded when another process invalidated it.
+    A missing row (None) is not cached, so the first write is seen at the next read.
+    """
+
+    def __init__(self, name: str, check_interval: float = APP_CONFIG_CHECK_INTERVAL) -> None:
+        self.name = name
+        self.check_interval = check_interval
+        self._value: Any = MISSING
+        self._version = None
+        self._checked_at = 0.0
+        # Bumped on every drop, so a load that raced an invalidation is not cached
+        self._generation = 0
+        self.stats = {"hits": 0, "version_checks": 0, "reloads": 0, "redis_errors": 0, "pushed": 0}
+        _configs[name] = self
+
+    @property
+    def version_key(self) -> str:
+        return f"app_config_version:{self.name}"
+
+    def drop(self):
+        """
+        Forget the local copy, the next get reloads it.
+        """
+        self._value = MISSING
+        self._generation += 1
+
+    async def get(self, load: Callable[[], Awaitable[Any]]) -> Any:
+        now = time.monotonic()
+        if self._value is not MISSING and now - self._checked_at < self.check_interval:
+            self.stats["hits"] += 1
+            return self._value
+
+        self.stats["version_checks"] += 1
+        try:
+            version = await get_async_redis().get(self.version_key)
+        except Exception as e:
+            self.stats["redis_errors"] += 1
+            logger.warning(f"Reading the {self.name} config version failed: {e}")
+            version = MISSING  # Unknown, so reload
+        if self._value is not MISSING and version is not MISSING and version == self._version:
+            self._checked_at = now
+            return self._value
+
+        self.stats["reloads"] += 1
+        generation = self._generation
+        value = await load()
+        if value is not None and generation == self._generation:
+            self._value = value
+            self._version = version
+            self._checked_at = now
+        return value
+
+    async def invalidate(self):
+        self.drop()
+        try:
+            await get_async_redis().incr(self.version_key)
+            await get_async_redis().publish(APP_CONFIG_CHANNEL, self.name)
+        except Exception as e:
+            self.stats["redis_errors"] += 1
+            logger.warning(f"Invalidating the {self.name} config failed: {e}")
+
+    def invalidate_sync(self):
+        """
+        Same as invalidate, for sync code such as Celery tasks.
+        """
+        self.drop()
+        try:
+            get_sync_redis().incr(self.version_key)
+            get_sync_redis().publish(APP_CONFIG_CHANNEL, self.name)
+        except Exception as e:
+            self.stats["redis_errors"] += 1
+            logger.warning(f"Invalidating the {self.name} config failed: {e}")
+
+
+class ConfigChangeListener:
+    """
+    Drops the local copy of a config as soon as any process invalidates it, so e.g. a webhook
+    verify token set by a Celery task is served by the web process right away.
+    """
+
+    def __init__(self) -> None:
+        self._listener: asyncio.Task = None
+
+    async def start(self):
+        self._listener = asyncio.create_task(self._listen(), name="app-config-listener")
+
+    async def stop(self):
+        if self._listener is not None:
+            self._listener.cancel()
+            await asyncio.gather(self._listener, return_exceptions=True)
+
+    async def _listen(self):
+        while True:
+            pubsub = get_async_redis().pubsub()
+            try:
+                await pubsub.subscribe(APP_CONFIG_CHANNEL)
+                async for message in pubsub.listen():
+                    if message["type"] == "subscribe":
+                        # Invalidations published while we were not subscribed are lost
+                        for config in _configs.values():
+                            config.drop()
+                    elif message["type"] == "message":
+                        config = _configs.get(message["data"])
+                        if config is not None:
+                            config.stats["pushed"] += 1
+                            config.drop()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"App config subscription failed, falling back to version checks: {e}")
+                await asyncio.sleep(1)
+            finally:
+                await pubsub.aclose()
+
+
+config_change_listener = ConfigChangeListener()
+
+register_metrics("app_config", lambda: {name: dict(config.stats) for name, config in _configs.items()})
@@ -25,12 +25,21 @@ class InvalidQueryParameter(BaseException):
 
 class ExternalServiceError(BaseException):
     """External service communication error"""
-    pass
+    def __init__(self, message: str, status_code: int = None, error_code: int = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.error_code = error_code
 
 class TelegramMessageHandlingError(BaseException):
     """Error occurred while handling a Telegram message."""
     pass
 
+class AssistantRunError(BaseException):
+    """Assistant run ended without a usable response."""
+    def __init__(self, message: str, status: str = None):
+        super().__init__(message)
+        self.status = status
+
 
 
 
@@ -111,3 +120,14 @@ def register_all_errors(app: FastAPI):
             },
         ),
     )
+
+    app.add_exception_handler(
+        AssistantRunError,
+        create_exception_handler(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            initial_detail={
+                "message": "Assistant run did not complete",
+                "error_code": "assistant_run_error",
+            },
+        ),
+    )
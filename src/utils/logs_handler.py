@@ -1,43 +1,158 @@
 import logging
-from sqlalchemy import create_engine
+import queue
+import sys
+import threading
+import time
+from datetime import datetime
+from itertools import count
+from sqlalchemy import create_engine, insert
 
 from src.db.models.log_models import LogEntry
 from sqlalchemy.orm import sessionmaker
-from src.core.config import SYNC_DATABASE_URL, EXTERNAL_LIBRARY_LEVEL_LOG, LOG_LEVEL
+from src.core.config import (
+    SYNC_DATABASE_URL,
+    EXTERNAL_LIBRARY_LEVEL_LOG,
+    LOG_LEVEL,
+    LOG_DB_QUEUE_SIZE,
+    LOG_DB_BATCH_SIZE,
+    LOG_DB_FLUSH_INTERVAL,
+    LOG_DB_OVERFLOW,
+    LOG_DB_SAMPLE_WATERMARK,
+    LOG_DB_SAMPLE_RATE,
+)
+from src.utils.metrics import register_metrics
 
 
 sync_engine = create_engine(SYNC_DATABASE_URL, echo=False)
 SyncSessionLocal = sessionmaker(bind=sync_engine)
 
+_STOP = object()
 
-class SyncDatabaseHandler(logging.Handler):
-    def emit(self, record):
-        if self.is_external_library(record) and record.levelno >= logging.getLevelName(EXTERNAL_LIBRARY_LEVEL_LOG):
-            log_entry = self.format(record)
-            add_log_to_db_sync(record.levelname, log_entry, record.name)
-        elif not self.is_external_library(record):
-            log_entry = self.format(record)
-            add_log_to_db_sync(record.levelname, log_entry, record.name)
+
+class BatchedDatabaseHandler(logging.Handler):
+    """
+    Buffers log records and writes them to the logs table from a background thread, in
+    batches of up to LOG_DB_BATCH_SIZE rows or every LOG_DB_FLUSH_INTERVAL seconds, so
+    logging never waits on the database. The buffer is bounded by LOG_DB_QUEUE_SIZE and
+    sheds records per LOG_DB_OVERFLOW instead of blocking when the database falls behind.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._queue: queue.Queue = queue.Queue(maxsize=LOG_DB_QUEUE_SIZE)
+        self._sampled = count()
+        self._writer = threading.Thread(target=self._write, name="db-log-writer", daemon=True)
+        self.stats = {"written": 0, "batches": 0, "dropped": 0, "sampled_out": 0, "write_errors": 0}
+        self._reported = {"dropped": 0, "sampled_out": 0}
+        self._writer.start()
+
+    def snapshot(self) -> dict:
+        return {**self.stats, "queued": self._queue.qsize()}
 
     def is_external_library(self, record) -> bool:
         return not record.name.startswith('src.')
 
-def add_log_to_db_sync(log_level: str, message: str, source: str):
-    # Create a new session for each log entry
-    session = SyncSessionLocal()
-    try:
-        log_entry = LogEntry(log_level=log_level, message=message, source=source)
-        session.add(log_entry)
-        session.commit()
-    except Exception as e:
-        session.rollback()
-        raise e
-    finally:
-        session.close()  # Close the session to avoid leakage
+    def emit(self, record):
+        if record.thread == self._writer.ident:
+            # Records of the writer itself, e.g. from SQLAlchemy, would feed back into the buffer
+            return
+        if self.is_external_library(record) and record.levelno < logging.getLevelName(EXTERNAL_LIBRARY_LEVEL_LOG):
+            return
+        if not self._admit(record):
+            return
+        try:
+            self._queue.put_nowait({
+                "timestamp": datetime.utcfromtimestamp(record.created),
+                "log_level": record.levelname,
+                "source": record.name,
+                "message": self.format(record),
+            })
+        except queue.Full:
+            self.stats["dropped"] += 1
+        except Exception:
+            self.handleError(record)
+
+    def _admit(self, record) -> bool:
+        if LOG_DB_OVERFLOW != "sample" or record.levelno >= logging.WARNING:
+            return True
+        if self._queue.qsize() < LOG_DB_QUEUE_SIZE * LOG_DB_SAMPLE_WATERMARK:
+            return True
+        if next(self._sampled) % LOG_DB_SAMPLE_RATE == 0:
+            return True
+        self.stats["sampled_out"] += 1
+        return False
+
+    def flush(self):
+        """
+        Wait, up to a few flush intervals, until every buffered record is written.
+        """
+        deadline = time.monotonic() + LOG_DB_FLUSH_INTERVAL * 5
+        while self._queue.unfinished_tasks and self._writer.is_alive() and time.monotonic() < deadline:
+            time.sleep(0.05)
+
+    def close(self):
+        if self._writer.is_alive():
+            try:
+                self._queue.put(_STOP, timeout=LOG_DB_FLUSH_INTERVAL)
+            except queue.Full:
+                pass
+            self._writer.join(LOG_DB_FLUSH_INTERVAL * 5)
+        super().close()
+
+    def _write(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + LOG_DB_FLUSH_INTERVAL
+            while batch[-1] is not _STOP and len(batch) < LOG_DB_BATCH_SIZE:
+                try:
+                    batch.append(self._queue.get(timeout=max(deadline - time.monotonic(), 0)))
+                except queue.Empty:
+                    break
+            stop = batch[-1] is _STOP
+            rows = [row for row in batch if row is not _STOP] + self._overflow_report()
+            if rows:
+                self._insert(rows)
+            for _ in batch:
+                self._queue.task_done()
+            if stop:
+                return
+
+    def _overflow_report(self) -> list:
+        """
+        One warning row for the records shed since the last report, so gaps in the logs table are visible.
+        """
+        dropped = self.stats["dropped"] - self._reported["dropped"]
+        sampled_out = self.stats["sampled_out"] - self._reported["sampled_out"]
+        if not dropped and not sampled_out:
+            return []
+        self._reported = {"dropped": self.stats["dropped"], "sampled_out": self.stats["sampled_out"]}
+        return [{
+            "timestamp": datetime.utcnow(),
+            "log_level": "WARNING",
+            "source": __name__,
+            "message": f"Log buffer full: {dropped} records dropped, {sampled_out} sampled out",
+        }]
+
+    def _insert(self, rows: list):
+        session = SyncSessionLocal()
+        try:
+            session.execute(insert(LogEntry), rows)
+            session.commit()
+            self.stats["written"] += len(rows)
+            self.stats["batches"] += 1
+        except Exception as e:
+            session.rollback()
+            self.stats["write_errors"] += 1
+            # Not through logging, which would route the error back into this handler
+            print(f"Writing {len(rows)} log records to the database failed: {e}", file=sys.stderr)
+        finally:
+            session.close()
+
 
 def setup_logging():
-    db_handler = SyncDatabaseHandler()
+    db_handler = BatchedDatabaseHandler()
     logging.getLogger().addHandler(db_handler)
     logging.getLogger().setLevel(logging.getLevelName(LOG_LEVEL))
+    register_metrics("db_logs", db_handler.snapshot)
     logging.getLogger().info("Application started")
-
+    return db_handler
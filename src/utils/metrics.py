@@ -0,0 +1,94 @@
+import logging
+import time
+from collections import deque
+from typing import Callable
+from fastapi import FastAPI
+
+
+logger = logging.getLogger(__name__)
+
+_providers: dict[str, Callable[[], dict]] = {}
+
+
+def register_metrics(name: str, provider: Callable[[], dict]):
+    """
+    Register a callable returning a snapshot of counters under the given name.
+    """
+    _providers[name] = provider
+
+
+def collect_metrics() -> dict:
+    """
+    Collect the snapshots of all registered metric providers.
+    """
+    snapshot = {}
+    for name, provider in _providers.items():
+        try:
+            snapshot[name] = provider()
+        except Exception as e:
+            logger.error(f"Error collecting metrics for {name}: {e}")
+            snapshot[name] = {"error": str(e)}
+    return snapshot
+
+
+def register_metrics_endpoint(app: FastAPI, path: str):
+
+    @app.get(path, tags=["Metrics"])
+    async def metrics():
+        return collect_metrics()
+
+
+class LatencyRecorder:
+    """
+    Keeps count, average, max and recent percentiles of durations per stage.
+    """
+
+    def __init__(self, samples: int = 1000) -> None:
+        self.samples = samples
+        self._stages: dict[str, dict] = {}
+
+    def record(self, stage: str, seconds: float):
+        data = self._stages.get(stage)
+        if data is None:
+            data = self._stages[stage] = {"count": 0, "total": 0.0, "max": 0.0, "recent": deque(maxlen=self.samples)}
+        data["count"] += 1
+        data["total"] += seconds
+        data["max"] = max(data["max"], seconds)
+        data["recent"].append(seconds)
+
+    def snapshot(self) -> dict:
+        snapshot = {}
+        for stage, data in self._stages.items():
+            recent = sorted(data["recent"])
+            snapshot[stage] = {
+                "count": data["count"],
+                "avg": round(data["total"] / data["count"], 4),
+                "max": round(data["max"], 4),
+                "p50": round(recent[len(recent) // 2], 4),
+                "p95": round(recent[int(len(recent) * 0.95)], 4),
+            }
+        return snapshot
+
+
+class StageTimer:
+    """
+    Records the time spent between consecutive marks, plus the total since start, into a LatencyRecorder.
+    """
+
+    def __init__(self, recorder: LatencyRecorder, prefix: str, started_at: float = None) -> None:
+        self.recorder = recorder
+        self.prefix = prefix
+        self.started_at = started_at if started_at is not None else time.perf_counter()
+        self.last = self.started_at
+
+    def mark(self, stage: str) -> float:
+        now = time.perf_counter()
+        elapsed = now - self.last
+        self.recorder.record(f"{self.prefix}.{stage}", elapsed)
+        self.last = now
+        return elapsed
+
+    def finish(self) -> float:
+        total = time.perf_counter() - self.started_at
+        self.recorder.record(f"{self.prefix}.total", total)
+        return total
@@ -0,0 +1,39 @@
+import asyncio
+import time
+
+
+class TokenBucket:
+    """
+    Allows `rate` operations per second on average, with bursts of up to `capacity`.
+    """
+
+    def __init__(self, rate: float, capacity: float = 1) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated_at = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    @property
+    def tokens(self) -> float:
+        self._refill()
+        return self._tokens
+
+    def delay(self) -> float:
+        """
+        Seconds until a token is available, 0 if one is available now.
+        """
+        self._refill()
+        return 0.0 if self._tokens >= 1 else (1 - self._tokens) / self.rate
+
+    async def acquire(self):
+        """
+        Wait for a token and take it. Meant for a single consumer, e.g. the worker of one queue.
+        """
+        while (wait := self.delay()) > 0:
+            await asyncio.sleep(wait)
+        self._tokens -= 1
@@ -0,0 +1,55 @@
+"""
+Compare outbound request latency with a new httpx.AsyncClient per request (the old
+send path) against the shared per-host client from src.core.http_clients.
+
+    python -m testing.http_client_benchmark --url https://graph.instagram.com/v21.0/me -n 50
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from urllib.parse import urlsplit
+
+import httpx
+
+from src.core.http_clients import http_clients
+
+
+async def fresh_client(url: str) -> float:
+    started = time.perf_counter()
+    async with httpx.AsyncClient() as client:
+        await client.get(url)
+    return time.perf_counter() - started
+
+
+async def shared_client(url: str) -> float:
+    parts = urlsplit(url)
+    client = http_clients.get(f"{parts.scheme}://{parts.netloc}")
+    started = time.perf_counter()
+    await client.get(parts.path or "/", params=parts.query or None)
+    return time.perf_counter() - started
+
+
+def report(name: str, samples: list[float]):
+    samples = sorted(samples)
+    print(
+        f"{name:>7}: mean {statistics.mean(samples) * 1000:7.1f} ms  "
+        f"p50 {samples[len(samples) // 2] * 1000:7.1f} ms  "
+        f"p95 {samples[int(len(samples) * 0.95)] * 1000:7.1f} ms"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default="https://graph.instagram.com/v21.0/me")
+    parser.add_argument("-n", type=int, default=50)
+    args = parser.parse_args()
+
+    # Requests are sequential, like the sends of one conversation
+    report("fresh", [await fresh_client(args.url) for _ in range(args.n)])
+    report("shared", [await shared_client(args.url) for _ in range(args.n)])
+    await http_clients.aclose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())